@@ -1,12 +1,103 @@
 import os
 import pandas as pd
-from flask import Flask, jsonify, render_template_string, request, render_template
-from config import DATA_DIR, logger
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template_string,
+    request,
+    render_template,
+    stream_with_context,
+)
+import columnar
+from config import (
+    DATA_DIR,
+    DATASET_CACHE_MAX_MB,
+    MASTER_DB_FILENAME,
+    MAX_CONCURRENT_REQUESTS,
+    REQUEST_QUEUE_TIMEOUT,
+    METRICS_REPORT_DIR,
+    SEARCH_INDEX_FILE,
+    STREAM_CHUNK_ROWS,
+    TAIL_MAX_BYTES,
+    logger,
+)
+from csv_tail import read_csv_delta
+from data_manager import JOB_COLUMNS
+from dataset_cache import DatasetCache, file_identity
+from dataset_stats import STATS_COLUMNS, compute_stats
+from master_store import MasterStore
+from near_duplicates import collapse_clusters
+from salary import ensure_salary_columns, salary_read_columns
+from search_index import SearchIndex
+from streaming import (
+    STREAM_FORMATS,
+    compress_chunks,
+    encode_chunks,
+    iter_dataframes,
+    negotiate_encoding,
+)
+from datetime import datetime, timezone
+import hashlib
 import json
 import re
+import threading
+import time
 
 app = Flask(__name__, template_folder="templates")
 
+# 已解析的数据集和序列化后的响应，按 (路径, 修改时间, 大小) 缓存
+dataset_cache = DatasetCache(DATASET_CACHE_MAX_MB * 1024 * 1024)
+
+# 同时处理的 /api 请求上限 (每个进程)，避免大量并发请求同时解析数据集
+request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+started_at = time.time()
+
+
+@app.before_request
+def acquire_request_slot():
+    if not request.path.startswith("/api/"):
+        return None
+    if not request_slots.acquire(timeout=REQUEST_QUEUE_TIMEOUT):
+        response = jsonify({"error": "Server busy, please retry later"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    request.environ["boss.request_slot"] = True
+    return None
+
+
+@app.teardown_request
+def release_request_slot(exc=None):
+    # 流式响应在发送完毕后才会执行 teardown，期间一直占用名额
+    if request.environ.pop("boss.request_slot", False):
+        request_slots.release()
+
+
+def cached_json_response(identity: tuple, build):
+    """
+    返回带 ETag/Last-Modified 的JSON响应。
+    客户端的 If-None-Match 命中时直接返回 304，否则优先使用缓存的序列化结果，
+    未命中时调用 build() 生成数据。
+    """
+    variant = f"{request.path}?{request.query_string.decode()}"
+    etag = hashlib.sha1(f"{identity}|{variant}".encode()).hexdigest()
+    last_modified = datetime.fromtimestamp(identity[1] / 1e9, tz=timezone.utc)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = dataset_cache.get_or_set(
+            ("response", identity, variant), lambda: app.json.dumps(build()).encode()
+        )
+        response = Response(body, mimetype="application/json")
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # 要求浏览器每次都带 ETag 重新验证，文件未变化时得到 304
+    response.cache_control.no_cache = True
+    return response
+
 
 @app.route("/")
 def index():
@@ -16,48 +107,508 @@ def index():
 
 @app.route("/api/files")
 def list_files():
-    """获取数据目录下的所有CSV和JSON文件列表"""
+    """
+    获取数据目录下的数据集列表：列式文件(.feather)、总表存储(.db)、CSV、JSON。
+    同名的数据集只列出读取最快的一种格式 (列式 > 总表存储 > CSV > JSON)，
+    例如运行结束生成 .feather 后不再列出同名的 CSV/JSON。
+    """
     if not os.path.exists(DATA_DIR):
         return jsonify([])
 
     cur_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(cur_dir, DATA_DIR)
 
-    try:
-        files = [
-            f for f in os.listdir(data_dir) if f.endswith(".csv") or f.endswith(".json")
-        ]
-        files.sort(reverse=True)  # 按名称倒序，最新的文件在最前面
+    def build_file_list():
+        files = list_datasets(data_dir)
         logger.info(f"找到 {len(files)} 个文件: {files}")
-        return jsonify(files)
+        return files
+
+    try:
+        # 目录的修改时间在文件增删时变化，可作为目录列表的缓存标识
+        return cached_json_response(file_identity(data_dir), build_file_list)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def list_datasets(data_dir: str) -> list:
+    """
+    数据目录中的数据集文件名，同名数据集只保留读取最快的格式，按名称倒序 (最新的在前)。
+    """
+    datasets = {}
+    for f in os.listdir(data_dir):
+        stem, ext = os.path.splitext(f)
+        if ext not in SUPPORTED_EXTENSIONS:
+            continue
+        current = datasets.get(stem)
+        if current is None or SUPPORTED_EXTENSIONS.index(ext) < SUPPORTED_EXTENSIONS.index(
+            os.path.splitext(current)[1]
+        ):
+            datasets[stem] = f
+    return sorted(datasets.values(), reverse=True)
+
+
+def preload_datasets(limit: int = None) -> list:
+    """
+    预先读取并解析数据集到缓存中 (总表优先，其余按名称倒序)。
+    生产模式下在创建工作进程之前调用，各进程通过 fork 共享这些只读的内存页。
+    缓存的是完整的数据集，仪表盘和统计按列读取时从中选取，不会重新解析。
+    :param limit: 最多预加载的数据集个数，默认全部 (受缓存上限约束)
+    :return: 已预加载的文件名
+    """
+    if not os.path.exists(DATA_DIR):
+        return []
+    files = list_datasets(DATA_DIR)
+    files.sort(key=lambda f: not f.startswith("all."))
+    loaded = []
+    for filename in files[:limit]:
+        try:
+            get_dataframe(os.path.join(DATA_DIR, filename))
+            loaded.append(filename)
+        except Exception as e:
+            logger.info(f"预加载 {filename} 失败: {e}")
+    return loaded
+
+
+# 按读取速度排序，/api/files 中同名数据集只列出靠前的格式
+SUPPORTED_EXTENSIONS = (columnar.COLUMNAR_EXTENSION, ".db", ".csv", ".json")
+
+# Tabulator 远程过滤的过滤类型 -> 过滤函数
+FILTER_FUNCS = {
+    "like": lambda col, v: col.astype(str).str.contains(v, case=False, regex=False),
+    "starts": lambda col, v: col.astype(str).str.startswith(v),
+    "ends": lambda col, v: col.astype(str).str.endswith(v),
+    "=": lambda col, v: col.astype(str) == v,
+    "!=": lambda col, v: col.astype(str) != v,
+    "<": lambda col, v: pd.to_numeric(col, errors="coerce") < float(v),
+    "<=": lambda col, v: pd.to_numeric(col, errors="coerce") <= float(v),
+    ">": lambda col, v: pd.to_numeric(col, errors="coerce") > float(v),
+    ">=": lambda col, v: pd.to_numeric(col, errors="coerce") >= float(v),
+}
+# 按数值比较的过滤类型，过滤值不是数值时忽略该过滤条件
+NUMERIC_FILTERS = ("<", "<=", ">", ">=")
+
+
+def is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def load_dataframe(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    将列式文件、CSV、JSON或总表存储读取为DataFrame，可只读取指定的列。
+    """
+    if file_path.endswith(columnar.COLUMNAR_EXTENSION):
+        return columnar.read_dataframe(file_path, columns)
+    elif file_path.endswith(".csv"):
+        if columns:
+            return pd.read_csv(file_path, usecols=lambda c: c in columns)
+        return pd.read_csv(file_path)
+    elif file_path.endswith(".json"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            df = pd.DataFrame(json.load(f))
+        return df[[c for c in columns if c in df.columns]] if columns else df
+    elif file_path.endswith(".db"):
+        store = MasterStore(file_path, JOB_COLUMNS)
+        try:
+            return store.read_dataframe(columns)
+        finally:
+            store.close()
+    raise ValueError("Unsupported file type")
+
+
+def get_dataframe(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    读取数据集，文件未变化时直接使用缓存中已解析的DataFrame (调用方不可修改)。
+    传入 columns 时只读取这些列 (列式文件只加载对应的列)，按列组合分别缓存；
+    完整的数据集已在缓存中 (如启动时预加载) 时，直接从中选取这些列，不再重新解析。
+    薪资数值列在读取时转换为数值 (旧文件缺少时批量计算)，随数据集一起缓存。
+    """
+    identity = file_identity(file_path)
+    columns, wanted = salary_read_columns(sorted(set(columns)) if columns else None)
+    if columns:
+        full = dataset_cache.get(("dataframe", identity, None))
+        if full is not None:
+            return full[[c for c in columns if c in full.columns]]
+    return dataset_cache.get_or_set(
+        ("dataframe", identity, tuple(columns) if columns else None),
+        lambda: ensure_salary_columns(load_dataframe(file_path, columns), wanted),
+    )
+
+
+def required_columns(args) -> list:
+    """
+    请求实际用到的列：fields 投影的列，加上过滤和排序涉及的列。
+    未指定 fields 时返回 None (读取全部列)。
+    """
+    fields = parse_fields(args)
+    if not fields:
+        return None
+    columns = set(fields)
+    for item in parse_indexed_params(args, "filter") + parse_indexed_params(args, "sort"):
+        if item.get("field"):
+            columns.add(item["field"])
+            if item["field"] in SORT_KEYS:
+                columns.add(SORT_KEYS[item["field"]])
+    if args.get("collapse") == "1":
+        columns.add("cluster_id")
+    return list(columns)
+
+
+def to_records(df: pd.DataFrame) -> list:
+    """将DataFrame转换为记录列表，NaN 替换为 None (在JSON中会变为 null)"""
+    return df.astype(object).where(pd.notnull(df), None).to_dict(orient="records")
+
+
+def parse_indexed_params(args, name: str) -> list:
+    """
+    解析 Tabulator 以 name[0][field]=...&name[0][dir]=... 形式发送的列表参数。
+    """
+    pattern = re.compile(rf"^{name}\[(\d+)\]\[(\w+)\]$")
+    items = {}
+    for key, value in args.items():
+        match = pattern.match(key)
+        if match:
+            items.setdefault(int(match.group(1)), {})[match.group(2)] = value
+    return [items[i] for i in sorted(items)]
+
+
+def parse_fields(args) -> list:
+    """解析列投影参数 fields=列1,列2"""
+    fields = args.get("fields", "")
+    return [f for f in fields.split(",") if f] or None
+
+
+# 按其他列排序的列：薪资文本按年收入估算排序
+SORT_KEYS = {"薪资": "annual_estimate"}
+
+
+def query_dataframe(df: pd.DataFrame, args) -> pd.DataFrame:
+    """
+    按 Tabulator 远程模式的 filter/sort 参数过滤和排序。
+    collapse=1 时每个相似职位簇只保留最近的一条 (过滤之后、排序之前合并)，并返回簇内的记录数 duplicates。
+    """
+    for flt in parse_indexed_params(args, "filter"):
+        field, value = flt.get("field"), flt.get("value", "")
+        filter_type = flt.get("type", "like")
+        func = FILTER_FUNCS.get(filter_type)
+        if field not in df.columns or func is None or value == "":
+            continue
+        if filter_type in NUMERIC_FILTERS and not is_number(value):
+            continue
+        df = df[func(df[field], value).fillna(False)]
+
+    if args.get("collapse") == "1":
+        df = collapse_clusters(df)
+
+    sorters = [
+        s for s in parse_indexed_params(args, "sort") if s.get("field") in df.columns
+    ]
+    if sorters:
+        df = df.sort_values(
+            by=[
+                SORT_KEYS[s["field"]] if SORT_KEYS.get(s["field"]) in df.columns else s["field"]
+                for s in sorters
+            ],
+            ascending=[s.get("dir", "asc") != "desc" for s in sorters],
+            na_position="last",
+            kind="stable",
+        )
+    return df
+
+
+def streamed_response(file_path: str, fmt: str):
+    """
+    流式返回整个数据集 (NDJSON 或 JSON 数组)，按块读取、编码和压缩。
+    按 Accept-Encoding 协商 br/gzip；ETag 与文件版本、参数和压缩方式绑定。
+    """
+    encoding = negotiate_encoding(request.accept_encodings)
+    variant = f"{request.path}?{request.query_string.decode()}|{encoding}"
+    etag = hashlib.sha1(f"{file_identity(file_path)}|{variant}".encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        chunks = encode_chunks(
+            iter_dataframes(file_path, STREAM_CHUNK_ROWS, parse_fields(request.args)), fmt
+        )
+        response = Response(
+            stream_with_context(compress_chunks(chunks, encoding)),
+            mimetype=STREAM_FORMATS[fmt],
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        # 避免反向代理缓冲整个响应
+        response.headers["X-Accel-Buffering"] = "no"
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
+
+
 @app.route("/api/data/<path:filename>")
 def get_file_data(filename):
-    """读取指定文件内容并以JSON格式返回"""
+    """
+    读取指定文件内容并以JSON格式返回。
+    - 不带 page 参数时返回全部记录 (数组)
+    - 带 page/size 参数时按 Tabulator 远程分页协议返回
+      {"last_page": n, "last_row": n, "data": [...]}，并支持 sort/filter 参数
+    - fields=列1,列2 只返回指定的列
+    - collapse=1 (分页时) 合并相似职位，每簇只返回一条，duplicates 为簇内的记录数
+    - stream=ndjson|json 流式返回全部记录 (每行一条记录 / JSON 数组)，支持 gzip/brotli 压缩
+    """
     file_path = os.path.join(DATA_DIR, filename)
 
     if not os.path.exists(file_path):
         return jsonify({"error": "File not found"}), 404
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    stream_format = request.args.get("stream")
+    if stream_format:
+        if stream_format not in STREAM_FORMATS:
+            return jsonify({"error": f"Unsupported stream format: {stream_format}"}), 400
+        return streamed_response(file_path, stream_format)
+
+    def build():
+        fields = parse_fields(request.args)
+        df = get_dataframe(file_path, required_columns(request.args))
+
+        if "page" not in request.args:
+            if fields:
+                df = df[[c for c in fields if c in df.columns]]
+            return to_records(df)
+
+        page = max(1, request.args.get("page", 1, type=int))
+        size = max(1, min(request.args.get("size", 100, type=int), 1000))
+
+        df = query_dataframe(df, request.args)
+        total = len(df)
+        last_page = max(1, -(-total // size))
+        page_df = df.iloc[(page - 1) * size : page * size]
+        if fields:
+            page_df = page_df[[c for c in fields if c in page_df.columns]]
+
+        return {"last_page": last_page, "last_row": total, "data": to_records(page_df)}
 
     try:
-        if filename.endswith(".csv"):
-            df = pd.read_csv(file_path)
-            # 处理 NaN 值，替换为 None (在JSON中会变为 null)
-            df = df.where(pd.notnull(df), None)
-            return jsonify(df.to_dict(orient="records"))
-        elif filename.endswith(".json"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return jsonify(data)
-        else:
-            return jsonify({"error": "Unsupported file type"}), 400
+        return cached_json_response(file_identity(file_path), build)
     except Exception as e:
         return jsonify({"error": f"Error processing file: {str(e)}"}), 500
 
 
+@app.route("/api/row/<path:filename>")
+def get_row_data(filename):
+    """
+    按 bossURL 返回单条记录，用于表格展开行时按需加载职位描述等大字段。
+    """
+    file_path = os.path.join(DATA_DIR, filename)
+    boss_url = request.args.get("bossURL")
+
+    if not os.path.exists(file_path):
+        return jsonify({"error": "File not found"}), 404
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    try:
+        fields = parse_fields(request.args)
+        df = get_dataframe(file_path, fields + ["bossURL"] if fields else None)
+        if "bossURL" not in df.columns:
+            return jsonify({"error": "bossURL column not found"}), 400
+        df = df[df["bossURL"] == boss_url]
+        if df.empty:
+            return jsonify({"error": "Row not found"}), 404
+        if fields:
+            df = df[[c for c in fields if c in df.columns]]
+        return jsonify(to_records(df.tail(1))[0])
+    except Exception as e:
+        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+
+
+@app.route("/api/tail/<path:filename>")
+def get_file_delta(filename):
+    """
+    增量读取正在写入的CSV：只返回客户端游标 offset (字节偏移) 之后新追加的记录。
+    返回 {"offset": 新游标, "reset": 是否从头读取, "rows": [...]}，
+    reset 为 true 时客户端应丢弃已有数据 (文件被替换或游标无效)。
+    """
+    file_path = os.path.join(DATA_DIR, filename)
+
+    if not os.path.exists(file_path):
+        return jsonify({"error": "File not found"}), 404
+    if not filename.endswith(".csv"):
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    try:
+        offset = request.args.get("offset", 0, type=int)
+        delta = read_csv_delta(file_path, offset, TAIL_MAX_BYTES)
+        fields = parse_fields(request.args)
+        if fields:
+            delta["rows"] = [
+                {c: row.get(c) for c in fields if c in row} for row in delta["rows"]
+            ]
+        return jsonify(delta)
+    except Exception as e:
+        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+
+
+@app.route("/api/stats/<path:filename>")
+def get_file_stats(filename):
+    """
+    返回数据集的汇总统计 (供图表使用)：
+    - groups: 按 base地点/公司/工作经验/学历 分组的职位数和年收入估算分位数
+    - tags: 领域tag/福利待遇 中各标签的出现次数
+    - daily: 每天获取的职位数
+    参数 section=groups|tags|daily 只返回其中一部分，top=n 限制每个分组/标签列表的条数 (默认 20，0 为不限)。
+    统计结果按数据集版本缓存，文件变化前只计算一次。
+    """
+    file_path = os.path.join(DATA_DIR, filename)
+
+    if not os.path.exists(file_path):
+        return jsonify({"error": "File not found"}), 404
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    def build():
+        identity = file_identity(file_path)
+        stats = dataset_cache.get_or_set(
+            ("stats", identity, None),
+            lambda: compute_stats(get_dataframe(file_path, STATS_COLUMNS)),
+        )
+        top = max(0, request.args.get("top", 20, type=int))
+        section = request.args.get("section")
+
+        result = {"rows": stats["rows"]}
+        for name in ("groups", "tags"):
+            if section in (None, name):
+                result[name] = {
+                    column: items[:top] if top else items
+                    for column, items in stats[name].items()
+                }
+        if section in (None, "daily"):
+            result["daily"] = stats["daily"]
+        return result
+
+    try:
+        return cached_json_response(file_identity(file_path), build)
+    except Exception as e:
+        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+
+
+@app.route("/api/search")
+def search_jobs():
+    """
+    全文搜索职位名称、领域tag和职位描述：q 为关键词 (空格分隔的多个词需同时命中)，
+    按相关度排序，page/size 分页，返回格式与远程分页一致，fields 可限制返回的列。
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing query parameter q"}), 400
+    if not os.path.exists(SEARCH_INDEX_FILE):
+        return jsonify({"last_page": 1, "last_row": 0, "data": []})
+
+    def build():
+        page = max(1, request.args.get("page", 1, type=int))
+        size = max(1, min(request.args.get("size", 20, type=int), 1000))
+        index = SearchIndex(SEARCH_INDEX_FILE)
+        try:
+            return index.search(query, page, size, parse_fields(request.args))
+        finally:
+            index.close()
+
+    try:
+        # 索引文件在每次提交后变化，未变化时同一查询直接使用缓存的结果
+        return cached_json_response(file_identity(SEARCH_INDEX_FILE), build)
+    except Exception as e:
+        return jsonify({"error": f"Error searching: {str(e)}"}), 500
+
+
+@app.route("/api/history")
+@app.route("/api/history/<path:boss_url>")
+def get_job_history(boss_url=None):
+    """
+    单个职位的变更历史 (总表存储中记录的字段级变化)。
+    职位可以写在路径中 (/api/history/https://www.zhipin.com/job_detail/xxx.html)，
+    也可以使用 bossURL 参数。
+    """
+    boss_url = request.args.get("bossURL") or boss_url
+    if not boss_url:
+        return jsonify({"error": "Missing bossURL"}), 400
+    # 路径中的 "https://" 可能被合并为 "https:/"
+    boss_url = re.sub(r"^(https?):/+", r"\1://", boss_url)
+    db_path = os.path.join(DATA_DIR, MASTER_DB_FILENAME)
+    if not os.path.exists(db_path):
+        return jsonify({"error": "Master store not found"}), 404
+
+    store = MasterStore(db_path, JOB_COLUMNS)
+    try:
+        history = store.history(boss_url)
+    except Exception as e:
+        return jsonify({"error": f"Error reading history: {str(e)}"}), 500
+    finally:
+        store.close()
+    if history is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(history)
+
+
+@app.route("/api/changes")
+def get_recent_changes():
+    """
+    最近 days 天内 field 列 (默认 "薪资") 发生变化的职位，按变化时间降序，最多 limit 条。
+    """
+    field = request.args.get("field", "薪资")
+    days = request.args.get("days", 7, type=float)
+    limit = max(1, min(request.args.get("limit", 500, type=int), 5000))
+    db_path = os.path.join(DATA_DIR, MASTER_DB_FILENAME)
+    if not os.path.exists(db_path):
+        return jsonify([])
+
+    store = MasterStore(db_path, JOB_COLUMNS)
+    try:
+        return jsonify(store.recent_changes(field, days, limit))
+    except Exception as e:
+        return jsonify({"error": f"Error reading history: {str(e)}"}), 500
+    finally:
+        store.close()
+
+
+@app.route("/healthz")
+def health():
+    """
+    健康检查：进程存活即返回 200，附带缓存和并发占用情况。
+    """
+    return jsonify(
+        {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - started_at, 1),
+            "cache": dataset_cache.summary(),
+            "max_concurrent_requests": MAX_CONCURRENT_REQUESTS,
+        }
+    )
+
+
+@app.route("/metrics")
+def get_metrics():
+    """
+    返回最近一次爬取的运行报告 (分阶段耗时直方图和计数器)。
+    """
+    report_path = os.path.join(METRICS_REPORT_DIR, "latest.json")
+    if not os.path.exists(report_path):
+        return jsonify({"error": "No crawl report yet"}), 404
+
+    def load_report():
+        with open(report_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    try:
+        return cached_json_response(file_identity(report_path), load_report)
+    except Exception as e:
+        return jsonify({"error": f"Error reading report: {str(e)}"}), 500
+
+
 # --- 主程序入口 ---
 if __name__ == "__main__":
     # 确保数据目录存在
@@ -0,0 +1,448 @@
+# benchmark.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import columnar
+from data_manager import JOB_COLUMNS, DataManager
+from job_fields import description_html_to_text, finalize_job_data
+from metrics import CrawlMetrics
+from salary import add_salary_fields
+from stand_in_server import StandInSite, generate_cards, start_server
+from stream_writer import CsvStreamWriter
+
+# 离线性能测试：所有测试都在临时目录中进行，不访问真实网站，也不影响 boss_data 中的数据。
+#   python benchmark.py scrape --pages 5 --jobs-per-page 15 --detail-latency-ms 100
+#   python benchmark.py append --rows 10000
+#   python benchmark.py master --rows 10000 100000 1000000
+#   python benchmark.py api --rows 10000 100000
+#   python benchmark.py serve --rows 20000 --clients 16 --duration 10
+
+
+@contextlib.contextmanager
+def isolated_workdir():
+    """
+    切换到临时工作目录，结束后切回并删除。DataManager 和 app.py 的数据目录都是相对路径。
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="boss_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(cwd)
+
+
+def generate_jobs(count: int, seed: int = 0) -> list:
+    """
+    生成 count 条与爬取结果格式相同的职位数据。
+    """
+    jobs = []
+    for card in generate_cards(count, seed=seed):
+        job_data = {
+            "职位名称": card["jobName"],
+            "薪资": card["salaryDesc"],
+            "公司": card["brandName"],
+            "base地点": card["cityName"],
+            "工作经验": card["jobExperience"],
+            "学历": card["jobDegree"],
+            "福利待遇": ", ".join(card["welfareList"]),
+            "领域tag": ", ".join(card["skills"]),
+            "职位描述内容": description_html_to_text(
+                card["postDescription"].replace("\n", "<br>")
+            ),
+        }
+        url = f"https://www.zhipin.com/job_detail/{card['encryptJobId']}.html"
+        jobs.append(add_salary_fields(finalize_job_data(job_data, url, "2025-01-01 00:00:00")))
+    return jobs
+
+
+def write_jobs_csv(path: str, jobs: list):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with CsvStreamWriter(path, JOB_COLUMNS, flush_rows=10000) as writer:
+        for job in jobs:
+            writer.write(job)
+
+
+def bench_scrape(
+    pages: int,
+    jobs_per_page: int,
+    list_latency_ms: float = 0,
+    detail_latency_ms: float = 0,
+    concurrency: int = 1,
+    list_source: str = "dom",
+    extraction_mode: str = "evaluate",
+    throttle: bool = False,
+) -> dict:
+    """
+    启动本地替身站点，用 JobScraper 完整爬取一遍，返回吞吐量和分阶段耗时。
+    :param throttle: 是否保留请求间隔和限速，默认关闭以测量爬虫自身的开销
+    """
+    from patchright.sync_api import sync_playwright
+    from job_scraper import JobScraper
+
+    site = StandInSite.generate(
+        pages,
+        jobs_per_page,
+        list_latency=list_latency_ms / 1000,
+        detail_latency=detail_latency_ms / 1000,
+    )
+    server, root_url = start_server(site)
+    metrics = CrawlMetrics(name="benchmark")
+    try:
+        with isolated_workdir(), sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            context = browser.new_context(base_url=root_url)
+            page = context.new_page()
+            try:
+                with DataManager("benchmark.csv") as data_manager, contextlib.redirect_stdout(
+                    io.StringIO()
+                ):
+                    scraper = JobScraper(
+                        page,
+                        data_manager,
+                        concurrency=concurrency,
+                        known_ttl_hours=0,
+                        extraction_mode=extraction_mode,
+                        list_source=list_source,
+                        interested_url=root_url + "web/geek/recommend?tab=4&page=1",
+                        metrics=metrics,
+                        **({} if throttle else {"max_rps": 0}),
+                    )
+                    if not throttle:
+                        scraper.throttle.delay = scraper.throttle.min_delay = 0
+                    start = time.perf_counter()
+                    count = scraper.scrape_interested_jobs()
+                    elapsed = time.perf_counter() - start
+            finally:
+                browser.close()
+    finally:
+        server.shutdown()
+
+    report = metrics.report()
+    return {
+        "jobs": count,
+        "expected": pages * jobs_per_page,
+        "elapsed_s": round(elapsed, 2),
+        "jobs_per_s": round(count / elapsed, 2) if elapsed else 0.0,
+        "stages": {
+            name: {k: stage[k] for k in ("count", "mean_ms", "p50_ms", "p90_ms", "max_ms")}
+            for name, stage in report["stages"].items()
+        },
+        "counters": report["counters"],
+        # 从创建 CrawlMetrics 到写入第一条职位的耗时
+        "milestones_s": report["milestones_s"],
+    }
+
+
+def bench_append(rows: int) -> dict:
+    """
+    DataManager.append_to_csv 的逐条写入吞吐量 (包括 close 时的落盘)。
+    """
+    jobs = generate_jobs(rows)
+    with isolated_workdir(), contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        with DataManager("append.csv") as data_manager:
+            for job in jobs:
+                data_manager.append_to_csv(job)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(data_manager.csv_filename)
+    return {
+        "rows": rows,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed),
+        "csv_bytes": size,
+    }
+
+
+def bench_master(rows: int) -> dict:
+    """
+    update_master_file 的耗时：先写入空总表，再合并一次 10% 变化、10% 新增的运行数据。
+    """
+    jobs = generate_jobs(rows)
+    extra = generate_jobs(max(1, rows // 10), seed=1)
+    changed = [dict(job, 薪资="面议") for job in jobs[: rows // 10]]
+    second_run = changed + jobs[rows // 10 : rows // 5] + extra
+
+    result = {"rows": rows}
+    with isolated_workdir(), contextlib.redirect_stdout(io.StringIO()):
+        for label, run_jobs in (("initial", jobs), ("incremental", second_run)):
+            filename = f"{label}.csv"
+            write_jobs_csv(os.path.join("boss_data", filename), run_jobs)
+            with DataManager(filename) as data_manager:
+                start = time.perf_counter()
+                stats = data_manager.update_master_file()
+                elapsed = time.perf_counter() - start
+            result[label] = {"run_rows": len(run_jobs), "elapsed_s": round(elapsed, 3), **stats}
+        result["db_bytes"] = os.path.getsize(data_manager.master_db_filename)
+    return result
+
+
+def bench_api(rows: int, page_size: int = 100) -> dict:
+    """
+    /api/data 的响应时间和响应大小：全量、远程分页 (首次/缓存)、排序加过滤，
+    以及带 ETag 的重新验证。安装了 pyarrow 时同时测试列式文件。
+    """
+    import app
+
+    jobs = generate_jobs(rows)
+    client = app.app.test_client()
+    queries = {
+        "full": "",
+        "page": f"?page=1&size={page_size}",
+        "page_projected": f"?page=1&size={page_size}&fields=职位名称,薪资,公司,base地点",
+        "sort_filter": (
+            f"?page=2&size={page_size}&sort[0][field]=薪资&sort[0][dir]=desc"
+            "&filter[0][field]=base地点&filter[0][type]=like&filter[0][value]=上海"
+        ),
+    }
+
+    result = {"rows": rows}
+    with isolated_workdir():
+        csv_path = os.path.join("boss_data", "api.csv")
+        write_jobs_csv(csv_path, jobs)
+        files = ["api.csv"]
+        if columnar.is_available():
+            columnar.write_dataframe(app.get_dataframe(csv_path), columnar.columnar_path(csv_path))
+            files.append(os.path.basename(columnar.columnar_path(csv_path)))
+
+        for filename in files:
+            for name, query in queries.items():
+                app.dataset_cache.clear()
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = client.get(f"/api/data/{filename}{query}")
+                    timings.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                revalidated = client.get(
+                    f"/api/data/{filename}{query}",
+                    headers={"If-None-Match": response.headers["ETag"]},
+                )
+                revalidate_ms = (time.perf_counter() - start) * 1000
+                result.setdefault(filename, {})[name] = {
+                    "status": response.status_code,
+                    "cold_ms": round(timings[0], 1),
+                    "warm_ms": round(timings[1], 1),
+                    "revalidate_ms": round(revalidate_ms, 1),
+                    "revalidate_status": revalidated.status_code,
+                    "bytes": len(response.data),
+                }
+        app.dataset_cache.clear()
+    return result
+
+
+# 开发模式：与 python app.py 相同的 Flask 自带服务器 (不启用 debug 自动重载，便于结束进程)
+DEV_SERVER_CODE = "import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(url: str, process, timeout: float = 120) -> float:
+    """
+    轮询健康检查直到服务器可以响应，返回启动耗时 (秒)。
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务器进程已退出 (返回码 {process.returncode})")
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise TimeoutError(f"服务器在 {timeout} 秒内没有就绪: {url}")
+
+
+def _load_test(urls: list, clients: int, duration: float) -> dict:
+    """
+    clients 个线程在 duration 秒内轮流请求 urls，返回吞吐量和延迟分位数。
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            url = urls[i % len(urls)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, ConnectionError, OSError):
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1)
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.5),
+        "p90_ms": percentile(0.9),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def bench_serve(rows: int, clients: int = 16, duration: float = 10, workers: int = 2) -> dict:
+    """
+    分别启动开发服务器 (python app.py) 和生产模式 (python serve.py)，
+    用 clients 个并发客户端请求分页、排序过滤、统计接口，比较吞吐量和延迟。
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    jobs = generate_jobs(rows)
+    queries = [
+        "/api/data/serve.csv?page=1&size=100",
+        "/api/data/serve.csv?page=3&size=100&sort[0][field]=薪资&sort[0][dir]=desc",
+        "/api/data/serve.csv?page=1&size=50&filter[0][field]=base地点"
+        "&filter[0][type]=like&filter[0][value]=上海",
+        "/api/stats/serve.csv?section=groups&top=10",
+    ]
+    servers = {
+        "dev": lambda port: [sys.executable, "-c", DEV_SERVER_CODE.format(port=port)],
+        "serve": lambda port: [
+            sys.executable,
+            os.path.join(src_dir, "serve.py"),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+    }
+
+    result = {"rows": rows, "clients": clients, "duration_s": duration}
+    with isolated_workdir():
+        write_jobs_csv(os.path.join("boss_data", "serve.csv"), jobs)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([src_dir, os.environ.get("PYTHONPATH", "")]))
+        for name, command in servers.items():
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            urls = [base_url + urllib.parse.quote(q, safe="/?&=[]") for q in queries]
+            process = subprocess.Popen(
+                command(port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                startup = _wait_until_ready(base_url + "/healthz", process)
+                # 预热：首次请求解析数据集
+                start = time.perf_counter()
+                urllib.request.urlopen(urls[0], timeout=60).read()
+                first_ms = (time.perf_counter() - start) * 1000
+                result[name] = {
+                    "startup_s": round(startup, 2),
+                    "first_request_ms": round(first_ms, 1),
+                    **_load_test(urls, clients, duration),
+                }
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    return result
+
+
+def print_result(title: str, result: dict):
+    print(f"\n=== {title} ===")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Boss-Hunter 离线性能测试")
+    parser.add_argument("--output", help="将所有结果保存为JSON文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape_parser = subparsers.add_parser("scrape", help="爬取本地替身站点，测量 jobs/sec")
+    scrape_parser.add_argument("--pages", type=int, default=3)
+    scrape_parser.add_argument("--jobs-per-page", type=int, default=15)
+    scrape_parser.add_argument("--list-latency-ms", type=float, default=0)
+    scrape_parser.add_argument("--detail-latency-ms", type=float, default=0)
+    scrape_parser.add_argument("--concurrency", type=int, default=1)
+    scrape_parser.add_argument("--list-source", choices=["dom", "api"], default="dom")
+    scrape_parser.add_argument(
+        "--extraction-mode", choices=["evaluate", "locator"], default="evaluate"
+    )
+    scrape_parser.add_argument(
+        "--throttle", action="store_true", help="保留 config.py 中的请求间隔和限速"
+    )
+
+    for name, help_text, default_rows in (
+        ("append", "DataManager.append_to_csv 写入吞吐量", [10000]),
+        ("master", "update_master_file 合并耗时", [10000, 100000, 1000000]),
+        ("api", "/api/data 响应时间和大小", [10000, 100000]),
+        ("serve", "开发服务器与生产模式的并发吞吐量", [20000]),
+    ):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--rows", type=int, nargs="+", default=default_rows)
+        if name == "serve":
+            sub.add_argument("--clients", type=int, default=16)
+            sub.add_argument("--duration", type=float, default=10)
+            sub.add_argument("--workers", type=int, default=2)
+
+    args = parser.parse_args()
+
+    results = []
+    if args.command == "scrape":
+        result = bench_scrape(
+            args.pages,
+            args.jobs_per_page,
+            args.list_latency_ms,
+            args.detail_latency_ms,
+            args.concurrency,
+            args.list_source,
+            args.extraction_mode,
+            args.throttle,
+        )
+        print_result("scrape", result)
+        results.append(result)
+    else:
+        bench = {"append": bench_append, "master": bench_master, "api": bench_api}.get(
+            args.command
+        )
+        for rows in args.rows:
+            if args.command == "serve":
+                result = bench_serve(rows, args.clients, args.duration, args.workers)
+            else:
+                result = bench(rows)
+            print_result(f"{args.command} ({rows} rows)", result)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"command": args.command, "results": results}, f, ensure_ascii=False, indent=2
+            )
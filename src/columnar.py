@@ -0,0 +1,55 @@
+# columnar.py
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # 未安装 pyarrow 时不生成列式文件，网页仍读取CSV/JSON
+    pa = None
+    feather = None
+
+# 列式数据集 (Arrow IPC / Feather v2，不压缩)：
+# 网页读取时可只加载需要的列，并通过内存映射直接使用文件中的数据，无需解析文本。
+# CSV/JSON 仍然照常生成，作为导出格式。
+
+COLUMNAR_EXTENSION = ".feather"
+
+
+def is_available() -> bool:
+    return feather is not None
+
+
+def columnar_path(path: str) -> str:
+    """将 xxx.csv / xxx.db 等路径换成对应的列式文件路径。"""
+    return os.path.splitext(path)[0] + COLUMNAR_EXTENSION
+
+
+def write_dataframe(df: pd.DataFrame, path: str):
+    """
+    将 DataFrame 写为列式文件 (先写临时文件再替换，读取方不会读到写了一半的文件)。
+    不压缩，以便读取时内存映射。
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_dataframe(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    读取列式文件，只加载指定的列 (文件中不存在的列忽略)，使用内存映射。
+    """
+    if columns:
+        available = set(read_columns(path))
+        columns = [c for c in columns if c in available]
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def read_columns(path: str) -> list:
+    """返回列式文件中的列名，只读取文件的元数据。"""
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.names
@@ -9,6 +9,95 @@ INTERESTING_JOBS_URL = "https://www.zhipin.com/web/geek/recommend?tab=4&sub=1&pa
 
 # Data
 DATA_DIR= "boss_data"
+# 总表存储 (SQLite，以 bossURL 为主键)，all.csv 仅按需导出
+MASTER_DB_FILENAME = "all.db"
+# 每次更新总表后是否自动导出 all.csv
+MASTER_CSV_AUTO_EXPORT = False
+# 是否同时生成列式文件 (.feather，需要 pyarrow)，网页优先读取列式文件，CSV/JSON 仅作为导出格式
+COLUMNAR_OUTPUT = True
+
+# 详情页原始HTML快照存档，可用 offline_extract.py 离线重新提取
+ARCHIVE_HTML = False
+HTML_ARCHIVE_DIR = "boss_data/html_archive"
+
+# 爬取进度日志，用于 python main.py --resume 从中断处继续
+CRAWL_JOURNAL_FILE = "boss_data/crawl_journal.json"
+# 职位全文索引 (SQLite FTS5)，写入数据时增量更新，供网页中的全文搜索使用
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_FILE = "boss_data/search_index.sqlite"
+# 相似职位检测 (MinHash/LSH)：写入时为每条职位分配簇编号 cluster_id，
+# 职位描述的估算相似度达到阈值的职位归入同一簇，网页中可按簇合并显示
+NEAR_DUPLICATE_ENABLED = True
+NEAR_DUPLICATE_FILE = "boss_data/near_duplicates.sqlite"
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# 每次运行的分阶段耗时和计数器报告目录，latest.json 为最近一次运行的报告
+METRICS_REPORT_DIR = "boss_data/reports"
+
+# Scraper
+# 同时处于加载中的详情页数量上限，1 表示逐个访问（原有的串行模式）
+SCRAPE_CONCURRENCY = 1
+# 详情页全局请求速率上限 (次/秒)，<= 0 表示不限速
+SCRAPE_MAX_RPS = 1.0
+# 总表中已存在且获取时间在该时长(小时)以内的职位不再访问详情页，<= 0 表示总是重新爬取
+KNOWN_JOB_TTL_HOURS = 72
+# 自适应请求间隔 (AIMD，单位: 秒)：响应变慢或遇到安全验证时放大，正常时逐步缩小
+THROTTLE_INITIAL_DELAY = 1.0
+THROTTLE_MIN_DELAY = 0.3
+THROTTLE_MAX_DELAY = 30.0
+THROTTLE_SLOW_SECONDS = 5.0
+THROTTLE_DECREASE_STEP = 0.1
+THROTTLE_BACKOFF_FACTOR = 2.0
+# 列表数据来源："dom" 读取渲染后的列表并点击翻页；"api" 截获列表接口的JSON数据 (失败时退回 DOM)
+LIST_SOURCE = "dom"
+# “感兴趣”列表接口URL中包含的路径
+LIST_API_URL_PATTERN = "/wapi/zprelation/interaction/geekGetJob"
+# 详情页提取方式："evaluate" 在页面内一次往返收集所有字段；"locator" 逐字段调用定位器 (原有方式，用于对比耗时)
+EXTRACTION_MODE = "evaluate"
+
+# Web app
+# 已解析数据集及序列化响应的进程内缓存上限 (MB)
+DATASET_CACHE_MAX_MB = 256
+# 增量读取接口单次最多读取的字节数
+TAIL_MAX_BYTES = 4 * 1024 * 1024
+# 生产模式 (python serve.py)：工作进程数、每个进程的线程数，
+# 以及同时处理的 /api 请求上限，超过时排队等待，等待超时返回 503
+SERVE_HOST = "0.0.0.0"
+SERVE_PORT = 5000
+SERVE_WORKERS = 2
+SERVE_THREADS = 8
+# 每个进程的 /api 请求上限，须小于线程数才会生效：其余线程在上限处排队，并可继续响应 /healthz
+MAX_CONCURRENT_REQUESTS = max(1, SERVE_THREADS // 2)
+REQUEST_QUEUE_TIMEOUT = 10
+# 流式输出 (/api/data?stream=ndjson|json) 每块的行数，服务器同一时间只持有一块
+STREAM_CHUNK_ROWS = 1000
+
+# Browser session
+# 浏览器配置目录 (persistent context)：登录状态、HTTP缓存、Service Worker 和 localStorage 在多次运行之间保留，
+# 分片模式下每个账号使用 <目录>_<账号名>；设为 None 时每次使用新的浏览器上下文，
+# 登录状态通过 cookies 文件和 STORAGE_STATE_FILE (cookies + localStorage) 恢复
+BROWSER_PROFILE_DIR = "browser_profile"
+STORAGE_STATE_FILE = "storage_state.json"
+# 登录凭证所在的 cookie：本地检查其过期时间，未过期时直接打开推荐页，不经过登录页
+SESSION_COOKIE_NAMES = ("wt2", "zp_at")
+# 距离过期不足该秒数的 cookie 视为已过期
+SESSION_EXPIRY_MARGIN = 300
+# 已登录时页头中出现的用户头像，出现即确认登录状态有效；超过等待时间 (毫秒) 未出现视为已失效
+LOGGED_IN_SELECTOR = ".user-nav .nav-figure"
+LOGGED_IN_TIMEOUT = 10000
+
+# Lightweight crawl mode
+# 开启后拦截详情页中的图片、字体、媒体和第三方统计请求，只保留页面自身的脚本和样式
+LIGHTWEIGHT_MODE = False
+BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+BLOCKED_HOSTS = (
+    "hm.baidu.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "cnzz.com",
+    "growingio.com",
+    "sensorsdata.cn",
+)
 
 # Logger, highlighting events
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -0,0 +1,110 @@
+# crawl_journal.py
+
+import json
+import os
+from datetime import datetime
+
+
+class CrawlJournal:
+    """
+    爬取进度日志，用于中断后恢复。
+    快照文件 (JSON) 记录本次运行的CSV文件名、当前页码和该页待访问的URL，每开始一页时
+    通过 临时文件 + os.replace 原子写入；已提取完成的URL逐行追加到 <path>.done，
+    每个职位的代价与已完成的数量无关。
+    落盘顺序：调用方先将职位所在的CSV行 fsync，再调用 mark_done 追加并 fsync 这一行，
+    因此 .done 中的URL一定已经写入CSV；反过来CSV中多出的职位恢复后会再访问一次，
+    写入总表时按 bossURL 去重。
+    """
+
+    def __init__(self, path: str, run_csv: str):
+        """
+        :param path: 日志文件路径
+        :param run_csv: 本次运行写入的CSV文件名 (DataManager 的 filename)
+        """
+        self.path = path
+        self.done_path = path + ".done"
+        self.run_csv = run_csv
+        self.page_number = 1
+        self.queued = []
+        self.done = set()
+        self.finished = False
+
+    @classmethod
+    def create(cls, path: str, run_csv: str):
+        """
+        为新的运行创建进度日志，清除上次运行留下的已完成记录。
+        """
+        journal = cls(path, run_csv)
+        if os.path.exists(journal.done_path):
+            os.remove(journal.done_path)
+        journal.save()
+        return journal
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        读取已有的进度日志，不存在时返回 None。
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        journal = cls(path, state["run_csv"])
+        journal.page_number = state.get("page_number", 1)
+        journal.queued = state.get("queued", [])
+        journal.finished = state.get("finished", False)
+        if os.path.exists(journal.done_path):
+            with open(journal.done_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            journal.done = {line[:-1] for line in lines if line.endswith("\n")}
+            # 进程中断时最后一行可能没有写完整，去掉这一行，以免之后追加的URL接在它后面
+            if lines and not lines[-1].endswith("\n"):
+                with open(journal.done_path, "w", encoding="utf-8") as f:
+                    f.writelines(lines[:-1])
+        return journal
+
+    def save(self):
+        state = {
+            "run_csv": self.run_csv,
+            "page_number": self.page_number,
+            "queued": self.queued,
+            "finished": self.finished,
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def start_page(self, page_number: int, urls: list):
+        """
+        记录开始处理某一页及该页待访问的URL，恢复时从这一页继续。
+        """
+        self.page_number = page_number
+        self.queued = list(urls)
+        self.save()
+
+    def mark_done(self, url: str):
+        """
+        记录一个职位已提取并写入CSV (追加一行并 fsync)。调用前职位所在的CSV行应已落盘。
+        """
+        if url in self.done:
+            return
+        self.done.add(url)
+        with open(self.done_path, "a", encoding="utf-8") as f:
+            f.write(url + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, url: str) -> bool:
+        return url in self.done
+
+    def finish(self):
+        """
+        标记本次爬取已全部完成，之后不再需要恢复。
+        """
+        self.finished = True
+        self.save()
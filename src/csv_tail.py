@@ -0,0 +1,81 @@
+# csv_tail.py
+
+import csv
+import io
+import os
+import threading
+
+# 表头缓存 {(绝对路径, inode): (列名列表, 表头结束的字节偏移)}
+# 运行中的CSV只会追加写入，表头不变，只需读取一次
+_header_cache = {}
+_header_lock = threading.Lock()
+
+
+def get_csv_header(file_path: str) -> tuple:
+    """
+    返回 (列名列表, 表头结束的字节偏移)。
+    """
+    key = (os.path.abspath(file_path), os.stat(file_path).st_ino)
+    with _header_lock:
+        cached = _header_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with open(file_path, "rb") as f:
+        line = f.readline()
+    if not line.endswith(b"\n"):
+        # 表头尚未写完整
+        return [], 0
+    header = next(csv.reader([line.decode("utf-8-sig")]))
+    result = (header, len(line))
+    with _header_lock:
+        _header_cache[key] = result
+    return result
+
+
+def read_csv_delta(file_path: str, offset: int, max_bytes: int) -> dict:
+    """
+    读取CSV中从字节偏移 offset 开始新追加的完整记录。
+    只返回以换行结束且引号成对的记录，写了一半的行留到下次读取。
+    :param offset: 客户端上次得到的偏移，小于表头结束位置或超过文件大小时从头读取
+    :param max_bytes: 单次最多读取的字节数
+    :return: {"offset": 新偏移, "reset": 是否从头读取, "rows": [...]}
+    """
+    header, header_end = get_csv_header(file_path)
+    if not header:
+        return {"offset": 0, "reset": True, "rows": []}
+
+    size = os.path.getsize(file_path)
+    reset = offset < header_end or offset > size
+    if reset:
+        offset = header_end
+
+    while True:
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(max_bytes)
+
+        # 按 \n 切分，字段内的 \r\n 位于引号中，引号未成对时继续拼接下一行
+        records = []
+        consumed = 0
+        pending = b""
+        for line in data.split(b"\n")[:-1]:
+            pending += line + b"\n"
+            if pending.count(b'"') % 2 == 0:
+                records.append(pending)
+                consumed += len(pending)
+                pending = b""
+
+        # 单条记录超过读取上限时扩大读取范围，保证游标能够前进
+        if consumed == 0 and len(data) == max_bytes:
+            max_bytes *= 2
+            continue
+        break
+
+    text = b"".join(records).decode("utf-8")
+    rows = [
+        {column: (value if value != "" else None) for column, value in zip(header, values)}
+        for values in csv.reader(io.StringIO(text, newline=""))
+        if values
+    ]
+    return {"offset": offset + consumed, "reset": reset, "rows": rows}
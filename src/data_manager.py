@@ -1,19 +1,54 @@
 # data_manager.py
 
 import pandas as pd
+import csv
+import json
 import os
 
+import columnar
+from stream_writer import CsvStreamWriter, JsonLinesWriter
+from master_store import MasterStore
+from near_duplicates import DuplicateIndex, sync_master_store
+from salary import SALARY_COLUMNS, add_salary_fields, ensure_salary_columns
+from search_index import SearchIndex
+from config import (
+    COLUMNAR_OUTPUT,
+    MASTER_DB_FILENAME,
+    MASTER_CSV_AUTO_EXPORT,
+    NEAR_DUPLICATE_ENABLED,
+    SEARCH_INDEX_ENABLED,
+)
+
+# 职位数据的列顺序，与 JobScraper._extract_job_details 的输出保持一致，
+# 之后是写入时由 "薪资" 解析出的数值列 (见 salary.py) 和相似职位的簇编号 (见 near_duplicates.py)
+JOB_COLUMNS = [
+    "职位名称",
+    "薪资",
+    "公司",
+    "base地点",
+    "工作经验",
+    "学历",
+    "福利待遇",
+    "领域tag",
+    "职位描述内容",
+    "JD链接",
+    "bossURL",
+    "获取时间",
+] + SALARY_COLUMNS + ["cluster_id"]
+
 
 class DataManager:
     """
     负责数据处理和保存。
-    支持增量写入CSV文件。
+    支持增量写入CSV文件，可作为上下文管理器使用，退出时确保数据落盘。
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, use_search_index: bool = SEARCH_INDEX_ENABLED):
         """
         初始化DataManager，并设置好带时间戳的文件名。
         :param filename: 要保存的文件名
+        :param use_search_index: 写入时是否更新全文索引；分片进程不更新，
+                                 避免多个进程同时写入同一个索引，由合并分片时统一写入
         """
         self.filename = filename
         # 确保目录存在
@@ -22,59 +57,204 @@ class DataManager:
         print(f"准备将数据写入文件: {os.path.abspath(path)}")
         self.csv_filename = path
         self.json_filename = path.replace(".csv", ".json")
+        self.jsonl_filename = path.replace(".csv", ".jsonl")
+        # 流式写入器：文件只打开一次，按行数/时间间隔批量落盘
+        self.csv_writer = CsvStreamWriter(self.csv_filename, JOB_COLUMNS)
+        self.jsonl_writer = JsonLinesWriter(self.jsonl_filename)
         # 总表文件也放在boss_data目录下
         self.master_filename = os.path.join("boss_data", "all.csv")
+        self.master_db_filename = os.path.join("boss_data", MASTER_DB_FILENAME)
+        self.columnar_filename = columnar.columnar_path(path)
+        self.master_columnar_filename = columnar.columnar_path(self.master_filename)
+        self.master_store = None
+        # 全文索引，随写入增量更新
+        self.search_index = SearchIndex() if use_search_index else None
+        # 相似职位索引，更新总表时批量为本次的职位分配簇编号 (不在逐条写入的路径上)
+        self.duplicate_index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def flush(self):
+        """
+        将缓存中的数据写入CSV和JSON Lines文件，并提交全文索引。
+        """
+        self.csv_writer.flush()
+        self.jsonl_writer.flush()
+        if self.search_index is not None:
+            try:
+                self.search_index.flush()
+            except Exception as e:
+                print(f"  -> 提交全文索引时出错: {e}")
+
+    def sync(self):
+        """
+        将缓存中的数据写入CSV和JSON Lines文件并 fsync，用于记录进度之前保证数据已落盘。
+        """
+        self.csv_writer.sync()
+        self.jsonl_writer.sync()
+
+    def close(self):
+        """
+        写入剩余数据并关闭文件 (flush + fsync)。
+        """
+        self.csv_writer.close()
+        self.jsonl_writer.close()
+        if self.search_index is not None:
+            try:
+                self.search_index.close()
+            except Exception as e:
+                print(f"关闭全文索引时出错: {e}")
+            self.search_index = None
+        if self.duplicate_index is not None:
+            self.duplicate_index.close()
+            self.duplicate_index = None
+        if self.master_store is not None:
+            self.master_store.close()
+            self.master_store = None
+
+    def get_master_store(self) -> MasterStore:
+        """
+        打开总表存储。首次使用且存在旧的 all.csv 时，将其一次性导入。
+        """
+        if self.master_store is None:
+            self.master_store = MasterStore(self.master_db_filename, JOB_COLUMNS)
+            if self.master_store.is_empty() and os.path.exists(self.master_filename):
+                print(f"首次使用总表存储，正在导入已有的总表: {self.master_filename}")
+                stats = self.master_store.upsert_csv(self.master_filename)
+                print(f"已导入 {stats['inserted']} 条记录。")
+        return self.master_store
 
     def append_to_csv(self, job_data: dict):
         """
-        将单条职位数据追加到CSV文件。
-        如果文件不存在，则创建并写入表头。
+        将单条职位数据追加到CSV文件，同时写入JSON Lines文件。
+        如果文件不存在，则创建并写入表头。写入前补充薪资数值列。
         """
         if not job_data:
             return
 
-        # 将单条字典数据转换为DataFrame
-        df = pd.DataFrame([job_data])
-
-        # 检查文件是否存在，以决定是否需要写入表头
-        file_exists = os.path.exists(self.csv_filename)
-
         try:
-            # 使用 mode='a' 进行追加写入
-            # header=not file_exists 确保只在文件第一次创建时写入表头
-            df.to_csv(
-                self.csv_filename,
-                mode="a",
-                index=False,
-                header=not file_exists,
-                encoding="utf-8-sig",
-            )
+            add_salary_fields(job_data)
+            self.csv_writer.write(job_data)
+            self.jsonl_writer.write(job_data)
             print(f"  -> 已将职位 '{job_data['职位名称']}' 追加到CSV。")
         except Exception as e:
             print(f"  -> 追加到CSV文件时出错: {e}")
+            return
+        self._add_to_search_index(job_data)
+
+    def _add_to_search_index(self, job_data: dict):
+        """
+        将职位加入全文索引。索引出错时只报告，不影响已写入的CSV，
+        之后可运行 search_index.py rebuild 补充。
+        """
+        if self.search_index is None:
+            return
+        try:
+            self.search_index.add(job_data)
+        except Exception as e:
+            print(f"  -> 写入全文索引时出错: {e}")
+
+    def merge_shards(self, shard_csv_files: list) -> int:
+        """
+        将多个分片的CSV按给定顺序合并到本次运行的文件中，按 bossURL 去重 (保留先出现的)。
+        返回合并写入的条数。
+        """
+        seen_urls = set()
+        count = 0
+        for shard_csv in shard_csv_files:
+            if not os.path.exists(shard_csv):
+                print(f"分片文件不存在，跳过: {shard_csv}")
+                continue
+            with open(shard_csv, "r", encoding="utf-8-sig", newline="") as f:
+                for row in csv.DictReader(f):
+                    url = row.get("bossURL")
+                    if url in seen_urls:
+                        continue
+                    seen_urls.add(url)
+                    self.csv_writer.write(row)
+                    self.jsonl_writer.write(row)
+                    self._add_to_search_index(row)
+                    count += 1
+        self.flush()
+        print(f"已合并 {len(shard_csv_files)} 个分片，共 {count} 条职位数据。")
+        return count
+
+    def assign_clusters(self, rows: list):
+        """
+        为职位数据分配相似职位的簇编号 (写入 cluster_id)，全部加入索引后一次提交。
+        索引出错 (如被其他进程长时间锁定) 时保留原值，不影响总表的更新，
+        之后可运行 near_duplicates.py rebuild 补充。
+        """
+        if self.duplicate_index is None:
+            self.duplicate_index = DuplicateIndex()
+        try:
+            for row in rows:
+                row["cluster_id"] = self.duplicate_index.add(row)
+            self.duplicate_index.flush()
+        except Exception as e:
+            print(f"分配相似职位簇编号时出错: {e}")
+
+    def load_known_jobs(self) -> dict:
+        """
+        从总表中加载已知职位索引。
+        只读取 bossURL 和 获取时间 两列，返回 {bossURL: 获取时间(datetime)}。
+        """
+        try:
+            known = self.get_master_store().known_jobs()
+        except Exception as e:
+            print(f"读取总表索引时出错: {e}")
+            return {}
+
+        fetched_at = pd.to_datetime(pd.Series(list(known.values())), errors="coerce")
+        known_jobs = dict(zip(known.keys(), fetched_at))
+        print(f"已从总表加载 {len(known_jobs)} 条已知职位索引。")
+        return known_jobs
 
     def convert_csv_to_json(self):
         """
-        读取已生成的CSV文件，并将其转换为JSON文件。
+        将本次运行的数据转换为JSON文件。
+        优先逐行读取运行过程中同步写入的JSON Lines文件，无需重新解析整个CSV；
+        JSON Lines文件不存在时，退回到读取CSV文件。
         """
+        self.flush()
         try:
-            # 检查CSV文件是否存在
-            if not os.path.exists(self.csv_filename):
-                print("CSV文件不存在，无法转换为JSON。")
-                return
+            if os.path.exists(self.jsonl_filename):
+                with open(self.jsonl_filename, "r", encoding="utf-8") as src, open(
+                    self.json_filename, "w", encoding="utf-8"
+                ) as dst:
+                    dst.write("[")
+                    first = True
+                    for line in src:
+                        if not line.strip():
+                            continue
+                        record = json.dumps(
+                            json.loads(line), ensure_ascii=False, indent=4
+                        )
+                        dst.write("\n" if first else ",\n")
+                        dst.write(record)
+                        first = False
+                    dst.write("\n]" if not first else "]")
+            else:
+                # 检查CSV文件是否存在
+                if not os.path.exists(self.csv_filename):
+                    print("CSV文件不存在，无法转换为JSON。")
+                    return
 
-            # 读取完整的CSV文件
-            df = pd.read_csv(self.csv_filename)
+                # 读取完整的CSV文件
+                df = pd.read_csv(self.csv_filename)
 
-            # 将DataFrame转换为JSON格式的字符串
-            # orient='records' 会生成 [{column: value}, ...] 的列表形式
-            # force_ascii=False 确保中文字符能正确显示，而不是被编码
-            # indent=4 让JSON文件格式优美，易于阅读
-            json_str = df.to_json(orient="records", force_ascii=False, indent=4)
+                # orient='records' 会生成 [{column: value}, ...] 的列表形式
+                # force_ascii=False 确保中文字符能正确显示，而不是被编码
+                # indent=4 让JSON文件格式优美，易于阅读
+                json_str = df.to_json(orient="records", force_ascii=False, indent=4)
 
-            # 将JSON字符串写入文件
-            with open(self.json_filename, "w", encoding="utf-8") as f:
-                f.write(json_str)
+                # 将JSON字符串写入文件
+                with open(self.json_filename, "w", encoding="utf-8") as f:
+                    f.write(json_str)
 
             print(f"\nCSV文件已成功转换为JSON: {os.path.abspath(self.json_filename)}")
 
@@ -83,46 +263,79 @@ class DataManager:
 
     def update_master_file(self):
         """
-        将本次运行的CSV合并到总表 all.csv 中，并根据URL去重。
+        将本次运行的CSV按 bossURL upsert 到总表存储中。
+        已存在的职位以本次数据为准（比如薪资变化），总表保留最新的记录，
+        变化的字段 (旧值/新值) 记录在总表存储的历史表中。
         """
-        print("\n--- 开始更新总表 all.csv ---")
+        print("\n--- 开始更新总表 ---")
+        self.flush()
 
         # 1. 检查本次运行的CSV是否存在
         if not os.path.exists(self.csv_filename):
             print("当前运行的CSV文件不存在，无法更新总表。")
             return
 
-        # 2. 读取新数据
-        new_df = pd.read_csv(self.csv_filename)
-        if new_df.empty:
+        # 2. 为本次的职位批量分配相似职位簇编号
+        with open(self.csv_filename, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        if NEAR_DUPLICATE_ENABLED:
+            self.assign_clusters(rows)
+
+        # 3. 按主键 upsert，只涉及本次的新数据
+        store = self.get_master_store()
+        stats = store.upsert(rows, run=os.path.basename(self.csv_filename))
+        if not any(stats.values()):
             print("新数据为空，无需更新总表。")
             return
 
-        # 3. 读取或创建总表
-        if os.path.exists(self.master_filename):
-            print(f"读取已有的总表: {self.master_filename}")
-            master_df = pd.read_csv(self.master_filename)
-        else:
-            print("未找到总表，将创建新的 all.csv。")
-            master_df = pd.DataFrame()
-
-        # 4. 合并新旧数据
-        combined_df = pd.concat([master_df, new_df], ignore_index=True)
-
-        # 5. 根据'URL'列去重，保留最后一次出现的数据（即最新数据）
-        #    这可以确保如果职位信息有更新（比如薪资变化），总表里会保留最新的记录
-        initial_rows = len(combined_df)
-        combined_df.drop_duplicates(subset=["bossURL"], keep="last", inplace=True)
-        final_rows = len(combined_df)
-
-        newly_added_rows = final_rows - len(master_df)
-
-        print(f"合并完成：总共 {initial_rows} 条记录，去重后剩余 {final_rows} 条。")
-        if newly_added_rows > 0:
-            print(f"本次运行新增了 {newly_added_rows} 条独一无二的职位信息。")
-        else:
-            print("本次运行没有发现新的职位信息。")
-
-        # 6. 保存更新后的总表
-        combined_df.to_csv(self.master_filename, index=False, encoding="utf-8-sig")
-        print(f"总表已成功保存至: {os.path.abspath(self.master_filename)}")
+        print(
+            f"合并完成：新增 {stats['inserted']} 条，更新 {stats['updated']} 条，"
+            f"未变化 {stats['unchanged']} 条。总表共 {store.count()} 条记录。"
+        )
+        print(f"总表已成功保存至: {os.path.abspath(self.master_db_filename)}")
+
+        # 4. 新职位可能使已有的相似职位簇合并，同步总表中受影响记录的簇编号
+        if self.duplicate_index is not None:
+            updated = sync_master_store(store, self.duplicate_index)
+            if updated:
+                print(f"已更新 {updated} 条记录的相似职位簇编号。")
+
+        # 5. 按需导出 all.csv，并更新总表的列式文件
+        if MASTER_CSV_AUTO_EXPORT:
+            self.export_master_csv()
+        self.export_master_columnar()
+        return stats
+
+    def write_columnar(self):
+        """
+        将本次运行的数据写为列式文件 (与CSV同名的 .feather)，薪资数值列保存为数值类型。
+        未开启 COLUMNAR_OUTPUT 或未安装 pyarrow 时跳过。
+        """
+        if not (COLUMNAR_OUTPUT and columnar.is_available()):
+            return
+        self.flush()
+        if not os.path.exists(self.csv_filename):
+            return
+        try:
+            df = ensure_salary_columns(pd.read_csv(self.csv_filename))
+            columnar.write_dataframe(df, self.columnar_filename)
+            print(f"列式文件已保存至: {os.path.abspath(self.columnar_filename)}")
+        except Exception as e:
+            print(f"写入列式文件时出错: {e}")
+
+    def export_master_columnar(self):
+        """
+        将总表存储导出为列式文件 all.feather，供网页按列读取。
+        """
+        try:
+            if self.get_master_store().export_columnar(self.master_columnar_filename) is not None:
+                print(f"总表列式文件已保存至: {os.path.abspath(self.master_columnar_filename)}")
+        except Exception as e:
+            print(f"写入总表列式文件时出错: {e}")
+
+    def export_master_csv(self):
+        """
+        将总表存储导出为 all.csv。
+        """
+        rows = self.get_master_store().export_csv(self.master_filename)
+        print(f"总表已导出至: {os.path.abspath(self.master_filename)}，共 {rows} 条记录。")
@@ -0,0 +1,104 @@
+# dataset_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def file_identity(path: str) -> tuple:
+    """
+    文件标识 (绝对路径, 修改时间, 大小)，文件内容变化后标识随之变化。
+    """
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def estimate_size(value) -> int:
+    """
+    粗略估计缓存对象占用的内存字节数。
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 8 * len(value)
+    return 64
+
+
+class DatasetCache:
+    """
+    进程内的数据集缓存，按总内存占用做 LRU 淘汰。
+    缓存键的形式为 (类型, 文件标识, 附加键)；同一文件出现新的标识时，旧版本的条目会被立即清除。
+    多个线程同时请求同一个未缓存的键时，只有一个线程生成数据，其余线程等待其结果。
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        :param max_bytes: 缓存占用内存上限 (字节)
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        # 正在生成中的键 -> 锁
+        self.loading = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        with self.lock:
+            self._discard_stale(key)
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, old_size) = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+
+    def get_or_set(self, key, factory):
+        """
+        命中缓存时直接返回，否则调用 factory() 生成并写入缓存。
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self.set(key, value)
+        with self.lock:
+            self.loading.pop(key, None)
+        return value
+
+    def _discard_stale(self, key):
+        identity = key[1]
+        stale = [
+            k for k in self.entries if k[1][0] == identity[0] and k[1] != identity
+        ]
+        for k in stale:
+            self.total_bytes -= self.entries.pop(k)[1]
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.total_bytes}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
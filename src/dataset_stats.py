@@ -0,0 +1,70 @@
+# dataset_stats.py
+
+import pandas as pd
+
+# 数据集的汇总统计，供 /api/stats 返回给前端图表，避免把全部记录传到浏览器再聚合
+
+# 分组统计的列：每组的职位数和年收入估算的分位数
+GROUP_COLUMNS = ["base地点", "公司", "工作经验", "学历"]
+# 以逗号分隔的多值标签列：统计每个标签出现的次数
+TAG_COLUMNS = ["领域tag", "福利待遇"]
+# 分组统计使用的薪资列 (见 salary.py)
+SALARY_COLUMN = "annual_estimate"
+SALARY_QUANTILES = (0.25, 0.5, 0.75)
+# 标签列中表示“无”的占位值
+EMPTY_TAGS = ("", "N/A")
+# 计算统计需要读取的全部列
+STATS_COLUMNS = GROUP_COLUMNS + TAG_COLUMNS + [SALARY_COLUMN, "获取时间"]
+
+
+def _salary_summary(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    counts = df.groupby(column).size().rename("count")
+    if SALARY_COLUMN not in df.columns:
+        return counts.to_frame()
+    salary = pd.to_numeric(df[SALARY_COLUMN], errors="coerce").groupby(df[column])
+    quantiles = salary.quantile(list(SALARY_QUANTILES)).unstack()
+    quantiles.columns = [f"salary_p{int(q * 100)}" for q in quantiles.columns]
+    return pd.concat(
+        [counts, salary.count().rename("salary_count"), salary.mean().rename("salary_mean"), quantiles],
+        axis=1,
+    )
+
+
+def group_stats(df: pd.DataFrame, column: str) -> list:
+    """
+    按列分组：每组的职位数、有薪资数据的职位数、年收入估算的均值和分位数，按职位数降序。
+    """
+    summary = _salary_summary(df, column).sort_values("count", ascending=False, kind="stable")
+    summary = summary.round(0).astype(object).where(summary.notna(), None)
+    return [{"key": key, **values} for key, values in summary.to_dict(orient="index").items()]
+
+
+def tag_frequencies(df: pd.DataFrame, column: str) -> list:
+    """
+    统计逗号分隔标签的出现次数，按次数降序。
+    """
+    tags = df[column].dropna().astype(str).str.split(",").explode().str.strip()
+    counts = tags[~tags.isin(EMPTY_TAGS)].value_counts()
+    return [{"key": tag, "count": int(count)} for tag, count in counts.items()]
+
+
+def daily_counts(df: pd.DataFrame, column: str = "获取时间") -> list:
+    """
+    按获取日期统计职位数，按日期升序。
+    """
+    dates = pd.to_datetime(df[column], errors="coerce").dt.strftime("%Y-%m-%d").dropna()
+    counts = dates.value_counts().sort_index()
+    return [{"date": date, "count": int(count)} for date, count in counts.items()]
+
+
+def compute_stats(df: pd.DataFrame) -> dict:
+    """
+    计算数据集的全部汇总统计，数据集中不存在的列跳过。
+    :return: {"rows": n, "groups": {列: [...]}, "tags": {列: [...]}, "daily": [...]}
+    """
+    return {
+        "rows": len(df),
+        "groups": {c: group_stats(df, c) for c in GROUP_COLUMNS if c in df.columns},
+        "tags": {c: tag_frequencies(df, c) for c in TAG_COLUMNS if c in df.columns},
+        "daily": daily_counts(df) if "获取时间" in df.columns else [],
+    }
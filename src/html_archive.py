@@ -0,0 +1,67 @@
+# html_archive.py
+
+import gzip
+import hashlib
+import json
+import os
+
+from stream_writer import JsonLinesWriter
+
+
+class HtmlArchive:
+    """
+    详情页原始HTML的压缩快照存档。
+    - objects/ 下按内容的 sha256 保存 gzip 压缩的HTML，相同内容只保存一份
+    - index.jsonl 每行记录一次快照：bossURL、页面URL、获取时间、内容哈希
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: 存档目录
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_filename = os.path.join(root, "index.jsonl")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index_writer = JsonLinesWriter(self.index_filename)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:] + ".html.gz")
+
+    def put(self, boss_url: str, url: str, page_html: str, fetched_at: str) -> str:
+        """
+        保存一次快照，返回内容哈希。
+        """
+        data = page_html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_path, path)
+        self.index_writer.write(
+            {"bossURL": boss_url, "url": url, "获取时间": fetched_at, "sha256": digest}
+        )
+        return digest
+
+    def read(self, digest: str) -> str:
+        """
+        按内容哈希读取HTML。
+        """
+        with open(self._object_path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def entries(self) -> list:
+        """
+        按写入顺序返回所有快照记录。
+        """
+        self.index_writer.flush()
+        if not os.path.exists(self.index_filename):
+            return []
+        with open(self.index_filename, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def close(self):
+        self.index_writer.close()
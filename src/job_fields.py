@@ -0,0 +1,74 @@
+# job_fields.py
+
+from datetime import datetime
+import html
+import re
+
+# 职位字段的整理逻辑，不依赖浏览器，供在线爬取 (job_scraper) 和离线重新提取 (offline_extract) 共用
+
+# build_job_data 要求必须存在的字段
+REQUIRED_FIELDS = ["职位名称", "薪资", "base地点", "工作经验", "学历", "职位描述HTML"]
+
+
+def description_html_to_text(description_html: str) -> str:
+    """
+    将职位描述的HTML转换为纯文本：<br> 转为换行，移除其余标签并解码HTML实体。
+    """
+    description_text = re.sub(
+        r"<br\s*/?>", "\r\n", description_html, flags=re.IGNORECASE
+    )
+
+    # 移除替换后可能剩余的其他HTML标签（为了代码健壮性）
+    description_text = re.sub(r"<[^>]+>", "", description_text)
+
+    # 解码可能存在的HTML实体 (例如 &amp; -> &)
+    return html.unescape(description_text).strip()
+
+
+def finalize_job_data(job_data: dict, job_url: str, fetched_at: str = None) -> dict:
+    """
+    补充 JD链接、bossURL、获取时间 三列。
+    :param fetched_at: 获取时间，默认为当前时间
+    """
+    # 清理link_text中的双引号，防止破坏Excel公式
+    link_text = f"{job_data['职位名称']}-{job_data['base地点']}-{job_data['公司']}".replace(
+        '"', '""'
+    )
+    hyperlink_formula = f'=HYPERLINK("{job_url}", "{link_text}")'
+
+    # 单独添加一列原始链接，方便其他程序处理
+    job_data["JD链接"] = hyperlink_formula
+
+    job_data["bossURL"] = job_url.split("?")[0]  # 去除查询参数部分
+
+    job_data["获取时间"] = fetched_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return job_data
+
+
+def build_job_data(fields: dict, job_url: str, fetched_at: str = None) -> dict:
+    """
+    将页面中收集到的原始字段 (见 job_scraper.EXTRACT_JOB_FIELDS_JS) 转换为最终的职位数据。
+    必需字段缺失时抛出 ValueError。
+    """
+    if not fields:
+        raise ValueError("未找到职位信息区域")
+    missing = [name for name in REQUIRED_FIELDS if fields.get(name) is None]
+    if missing:
+        raise ValueError(f"未找到字段: {', '.join(missing)}")
+
+    welfare_tags = fields["福利待遇"]
+    highlights_tags = fields["领域tag"]
+    job_data = {
+        "职位名称": fields["职位名称"],
+        "薪资": fields["薪资"],
+        "公司": fields["公司"],
+        "base地点": fields["base地点"],
+        "工作经验": fields["工作经验"],
+        "学历": fields["学历"],
+        "福利待遇": (
+            ", ".join(tag.strip() for tag in welfare_tags) if welfare_tags else "N/A"
+        ),
+        "领域tag": ", ".join(highlights_tags) if highlights_tags else "N/A",
+        "职位描述内容": description_html_to_text(fields["职位描述HTML"]),
+    }
+    return finalize_job_data(job_data, job_url, fetched_at)
@@ -1,28 +1,329 @@
 # job_scraper.py
 
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 from patchright.sync_api import Page, expect
 import time
+import pandas as pd
 
+from crawl_journal import CrawlJournal
 from data_manager import DataManager
-from config import logger, INTERESTING_JOBS_URL
+from html_archive import HtmlArchive
+from metrics import CrawlMetrics
+from resource_blocker import ResourceBlocker
+from job_fields import build_job_data, description_html_to_text, finalize_job_data
+from throttle import AdaptiveThrottle, RateLimiter
+from config import (
+    logger,
+    BOSS_SECURITY_CHECK_URL,
+    INTERESTING_JOBS_URL,
+    SCRAPE_CONCURRENCY,
+    SCRAPE_MAX_RPS,
+    KNOWN_JOB_TTL_HOURS,
+    EXTRACTION_MODE,
+    THROTTLE_INITIAL_DELAY,
+    THROTTLE_MIN_DELAY,
+    THROTTLE_MAX_DELAY,
+    THROTTLE_SLOW_SECONDS,
+    THROTTLE_DECREASE_STEP,
+    THROTTLE_BACKOFF_FACTOR,
+    LIST_SOURCE,
+    LIST_API_URL_PATTERN,
+)
+
+# 列表接口中的字段 -> 职位数据的列名
+LIST_API_FIELDS = {
+    "职位名称": "jobName",
+    "薪资": "salaryDesc",
+    "公司": "brandName",
+    "base地点": "cityName",
+    "工作经验": "jobExperience",
+    "学历": "jobDegree",
+}
+
+def set_query_param(url: str, name: str, value) -> str:
+    """
+    替换或添加URL中的一个查询参数。
+    """
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != name]
+    query.append((name, str(value)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
 
+def parse_list_payload(payload: dict) -> tuple:
+    """
+    解析“感兴趣”列表接口的JSON数据。
+    :return: (职位列表, 是否还有下一页)，每个职位为 {"href": 详情页相对链接, "fields": 列表字段}
+    """
+    if payload.get("code", 0) != 0:
+        raise ValueError(f"接口返回错误: {payload.get('message')}")
+    data = payload.get("zpData") or {}
+    cards = data.get("cardList") or data.get("jobList") or []
+    jobs = []
+    for card in cards:
+        job_id = card.get("encryptJobId")
+        if not job_id:
+            continue
+        query = {k: card[k] for k in ("lid", "securityId") if card.get(k)}
+        href = f"/job_detail/{job_id}.html"
+        if query:
+            href += "?" + urlencode(query)
+        jobs.append(
+            {
+                "href": href,
+                "fields": {
+                    name: card.get(key)
+                    for name, key in LIST_API_FIELDS.items()
+                    if card.get(key)
+                },
+            }
+        )
+    return jobs, bool(data.get("hasMore"))
+
+
+# 列表中第一个职位链接的选择器，用于判断翻页后列表是否已刷新
+FIRST_JOB_LINK_SELECTOR = "ul.user-jobs-ul li.item-boss div.job-name a.name"
+
+# 从 Performance API 读取详情页的传输字节数和加载耗时
+# (跨域资源未提供 Timing-Allow-Origin 时 transferSize 为 0，因此字节数为下限估计)
+PAGE_STATS_JS = """
+() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    const resources = performance.getEntriesByType("resource");
+    const bytes = resources.reduce((sum, r) => sum + (r.transferSize || 0), nav ? nav.transferSize || 0 : 0);
+    return {
+        bytes: bytes,
+        requests: resources.length + 1,
+        dcl_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    };
+}
+"""
+
+# 页面自身从发起导航到 DOMContentLoaded 的耗时 (毫秒)，不含在页面池中排队等待的时间
+NAVIGATION_DCL_JS = """
+() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    return nav && nav.domContentLoadedEventEnd > 0 ? nav.domContentLoadedEventEnd - nav.startTime : null;
+}
+"""
+
+# 在详情页内一次性收集所有字段，选择器与 _extract_job_details_locator 保持一致
+EXTRACT_JOB_FIELDS_JS = """
+() => {
+    const text = (root, selector) => {
+        const el = root ? root.querySelector(selector) : null;
+        return el ? el.textContent.trim() : null;
+    };
+    const texts = (selector) =>
+        Array.from(document.querySelectorAll(selector), (el) => el.textContent);
+
+    const primary = document.querySelector("div.info-primary");
+
+    // 公司：常规位置缺失时，从HR信息中提取
+    const fallbacks = [];
+    let company = text(document, ".company-info-box .company-name");
+    if (company === null) {
+        fallbacks.push("company");
+        const bossInfo = text(document, ".boss-info-attr");
+        company = bossInfo !== null ? bossInfo.split("·")[0].trim() : "N/A";
+    }
+
+    // 工作经验：class名可能是 experiece 或 experience
+    let experience = text(primary, "p span.text-experiece");
+    if (experience === null) {
+        fallbacks.push("experience");
+        experience = text(primary, "p span.text-experience");
+    }
+
+    // 职位描述：标题为“职位描述”的区块
+    const section = Array.from(document.querySelectorAll(".job-detail-section")).find(
+        (el) => Array.from(el.querySelectorAll("h3")).some((h) => h.textContent.includes("职位描述"))
+    );
+    const description = section ? section.querySelector(".job-sec-text") : null;
+
+    return {
+        "职位名称": text(primary, "h1"),
+        "薪资": text(primary, "span.salary"),
+        "公司": company,
+        "base地点": text(primary, "p a.text-city"),
+        "工作经验": experience,
+        "学历": text(primary, "p span.text-degree"),
+        "福利待遇": texts(".job-banner .tag-container-new .tag-all.job-tags span"),
+        "领域tag": texts("ul.job-keyword-list li"),
+        "职位描述HTML": description ? description.innerHTML : null,
+        "_fallbacks": fallbacks,
+    };
+}
+"""
 
 class JobScraper:
     """
     负责爬取职位信息的类
     """
 
-    def __init__(self, page: Page, data_manager: DataManager):
+    def __init__(
+        self,
+        page: Page,
+        data_manager: DataManager,
+        concurrency: int = SCRAPE_CONCURRENCY,
+        max_rps: float = SCRAPE_MAX_RPS,
+        known_ttl_hours: float = KNOWN_JOB_TTL_HOURS,
+        extraction_mode: str = EXTRACTION_MODE,
+        html_archive: HtmlArchive = None,
+        resource_blocker: ResourceBlocker = None,
+        journal: CrawlJournal = None,
+        list_source: str = LIST_SOURCE,
+        interested_url: str = INTERESTING_JOBS_URL,
+        metrics: CrawlMetrics = None,
+    ):
+        """
+        :param page: 用于列表页的 Page 对象，详情页在同一 context 中打开
+        :param data_manager: 数据写入对象
+        :param concurrency: 同时加载中的详情页数量上限，1 为串行模式
+        :param max_rps: 详情页全局请求速率上限 (次/秒)，仅并发模式生效
+        :param known_ttl_hours: 总表中获取时间在该时长以内的职位跳过访问，<= 0 表示不跳过
+        :param extraction_mode: 详情页提取方式，"evaluate" (单次往返) 或 "locator" (逐字段)
+        :param html_archive: 传入时保存每个详情页的原始HTML快照
+        :param resource_blocker: 已安装在 context 上的资源拦截器 (轻量模式)，用于日志统计
+        :param journal: 爬取进度日志，传入时记录进度，并跳过其中已完成的职位
+        :param list_source: 列表数据来源，"dom" (读取渲染后的列表) 或 "api" (截获列表接口JSON，失败时退回 DOM)
+        :param interested_url: “感兴趣”列表页地址，可指向本地替身服务器进行测试
+        :param metrics: 分阶段耗时和计数器，未传入时新建
+        """
         self.page = page
-        self.interested_url = INTERESTING_JOBS_URL
+        self.interested_url = interested_url
         self.data_manager = data_manager
+        self.concurrency = max(1, concurrency)
+        # 轻量模式的路由处理函数只在调用 Playwright 期间执行，time.sleep 会使加载中的页面停住，
+        # 因此安装了资源拦截器时改用 wait_for_timeout 等待
+        sleep = self._wait_in_browser if resource_blocker is not None else time.sleep
+        self.rate_limiter = RateLimiter(max_rps, sleep=sleep)
+        self.throttle = AdaptiveThrottle(
+            THROTTLE_INITIAL_DELAY,
+            THROTTLE_MIN_DELAY,
+            THROTTLE_MAX_DELAY,
+            THROTTLE_SLOW_SECONDS,
+            THROTTLE_DECREASE_STEP,
+            THROTTLE_BACKOFF_FACTOR,
+            sleep=sleep,
+        )
+        self.known_ttl = timedelta(hours=known_ttl_hours)
+        self.known_jobs = {}
+        self.extraction_mode = extraction_mode
+        self.extraction_times = []
+        self.html_archive = html_archive
+        self.resource_blocker = resource_blocker
+        self.page_stats = []
+        self.journal = journal
+        self.metrics = metrics if metrics is not None else CrawlMetrics()
+        self.list_source = list_source
+        self.list_api_pattern = LIST_API_URL_PATTERN
+        # 接口方式下的列表字段 {bossURL: {...}}，用于补全详情页中缺失的字段
+        self.list_fields = {}
+        self.seen_urls = set()
+        self.count_job_data = 0
+        self.count_skipped = 0
+        self.count_resumed = 0
 
     def _extract_job_details(self, job_page: Page) -> dict:
         """
-        从职位详情页提取指定的9项信息 (已根据您提供的HTML更新)。
+        从职位详情页提取职位信息，并记录单页提取耗时。
+        evaluate 模式在页面内一次性收集所有字段；locator 模式逐个字段调用定位器。
         """
         logger.info("开始提取页面信息...")
+        start = time.perf_counter()
+        if self.extraction_mode == "locator":
+            job_data = self._extract_job_details_locator(job_page)
+        else:
+            job_data = self._extract_job_details_evaluate(job_page)
+        elapsed = time.perf_counter() - start
+        elapsed_ms = elapsed * 1000
+        self.extraction_times.append(elapsed_ms)
+        self.metrics.observe("extraction", elapsed)
+        self.metrics.incr("extraction_success" if job_data else "extraction_failure")
+        logger.info(f"提取耗时: {elapsed_ms:.0f} ms ({self.extraction_mode} 模式)")
+        self._record_page_stats(job_page)
+        if self.html_archive is not None:
+            self._archive_page(job_page, job_data)
+        return job_data
+
+    def _wait_in_browser(self, seconds: float):
+        """
+        通过 Playwright 等待，期间继续处理路由等事件。
+        """
+        self.page.wait_for_timeout(seconds * 1000)
+
+    def _record_page_stats(self, job_page: Page):
+        """
+        记录详情页的传输字节数和加载耗时，用于对比轻量模式的效果。
+        """
+        try:
+            stats = job_page.evaluate(PAGE_STATS_JS)
+        except Exception as e:
+            logger.info(f"读取页面资源统计时出错: {e}")
+            return
+        self.page_stats.append(stats)
+        dcl = f"{stats['dcl_ms']:.0f} ms" if stats["dcl_ms"] is not None else "N/A"
+        logger.info(
+            f"页面资源: {stats['bytes'] / 1024:.1f} KB / {stats['requests']} 个请求，"
+            f"DOMContentLoaded: {dcl}"
+        )
+
+    def _log_page_stats_summary(self):
+        """
+        输出本次运行详情页资源的汇总统计。
+        """
+        if not self.page_stats:
+            return
+        mode = "轻量模式" if self.resource_blocker is not None else "完整模式"
+        count = len(self.page_stats)
+        avg_kb = sum(s["bytes"] for s in self.page_stats) / count / 1024
+        dcl_values = [s["dcl_ms"] for s in self.page_stats if s["dcl_ms"] is not None]
+        avg_dcl = sum(dcl_values) / len(dcl_values) if dcl_values else 0
+        logger.info(
+            f"详情页资源统计 ({mode}): 平均 {avg_kb:.1f} KB/页，"
+            f"平均 DOMContentLoaded {avg_dcl:.0f} ms，共 {count} 页"
+        )
+        if self.resource_blocker is not None:
+            logger.info(self.resource_blocker.summary())
+
+    def _archive_page(self, job_page: Page, job_data: dict):
+        """
+        保存详情页HTML快照。提取失败的页面同样保存，便于选择器修正后离线重新提取。
+        """
+        try:
+            fetched_at = (job_data or {}).get("获取时间") or datetime.now().strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            self.html_archive.put(
+                job_page.url.split("?")[0], job_page.url, job_page.content(), fetched_at
+            )
+        except Exception as e:
+            logger.info(f"保存HTML快照时出错: {e}")
+
+    def _extract_job_details_evaluate(self, job_page: Page) -> dict:
+        """
+        通过一次 page.evaluate 往返提取所有字段（包括备用选择器），输出与 locator 模式相同。
+        """
+        try:
+            fields = job_page.evaluate(EXTRACT_JOB_FIELDS_JS)
+            for fallback in (fields or {}).get("_fallbacks", []):
+                self.metrics.incr(f"fallback_{fallback}")
+            job_data = build_job_data(fields, job_page.url)
+            logger.info(
+                f"\n\n====成功提取职位: 【{job_data['职位名称']} - {job_data['公司']} - {job_data['base地点']} - {job_data['薪资']}】====\n\n"
+            )
+            return job_data
+        except Exception as e:
+            logger.info(f"提取信息时出错: {e}")
+            return None
+
+    def _extract_job_details_locator(self, job_page: Page) -> dict:
+        """
+        从职位详情页提取指定的9项信息 (已根据您提供的HTML更新)。
+        """
         job_data = {}
         try:
             # 等待页面主要信息区域加载
@@ -48,6 +349,7 @@ class JobScraper:
                     .strip()
                 )
             except:
+                self.metrics.incr("fallback_company")
                 try:
                     # 方案二：从HR信息中提取
                     boss_info_text = (
@@ -68,6 +370,7 @@ class JobScraper:
                     primary_info.locator("p span.text-experiece").text_content().strip()
                 )
             except:
+                self.metrics.incr("fallback_experience")
                 job_data["工作经验"] = (
                     primary_info.locator("p span.text-experience")
                     .text_content()
@@ -110,37 +413,13 @@ class JobScraper:
             # description_text = (
             #     job_detail_section.locator(".job-sec-text").text_content().strip()
             # )
-            import re
-
             description_html = job_detail_section.locator(
                 ".job-sec-text"
             ).first.inner_html()
-            description_text = re.sub(
-                r"<br\s*/?>", "\r\n", description_html, flags=re.IGNORECASE
-            )
-
-            # 移除替换后可能剩余的其他HTML标签（为了代码健壮性）
-            description_text = re.sub(r"<[^>]+>", "", description_text)
-
-            # 解码可能存在的HTML实体 (例如 &amp; -> &)
-            import html
-
-            job_data["职位描述内容"] = html.unescape(description_text).strip()
+            job_data["职位描述内容"] = description_html_to_text(description_html)
 
             # --- 生成超链接和更新职位描述 ---
-            job_url = job_page.url
-            # 清理link_text中的双引号，防止破坏Excel公式
-            link_text = f"{job_data['职位名称']}-{job_data['base地点']}-{job_data['公司']}".replace(
-                '"', '""'
-            )
-            hyperlink_formula = f'=HYPERLINK("{job_url}", "{link_text}")'
-
-            # 单独添加一列原始链接，方便其他程序处理
-            job_data["JD链接"] = hyperlink_formula
-
-            job_data["bossURL"] = job_url.split("?")[0]  # 去除查询参数部分
-
-            job_data["获取时间"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            finalize_job_data(job_data, job_page.url)
 
             logger.info(
                 f"\n\n====成功提取职位: 【{job_data['职位名称']} - {job_data['公司']} - {job_data['base地点']} - {job_data['薪资']}】====\n\n"
@@ -151,22 +430,237 @@ class JobScraper:
             logger.info(f"提取信息时出错: {e}")
             return None
 
-    def scrape_interested_jobs(self):
+    def _normalize_job_url(self, href: str) -> str:
         """
-        打开“感兴趣”页面，使用正确的选择器自动翻页遍历所有JD，提取信息并返回
+        将列表页中的相对链接转换为与总表 bossURL 列一致的形式（绝对地址，去除查询参数）。
         """
-        logger.info("\n--- 开始爬取“感兴趣”的职位 ---")
-        self.page.goto(self.interested_url)
-        logger.info(f"已打开页面: {self.page.url}")
+        return urljoin(self.interested_url, href).split("?")[0]
 
+    def _is_known_fresh(self, href: str) -> bool:
+        """
+        判断职位是否已存在于总表且未过期，是则无需再次访问详情页。
+        """
+        if self.known_ttl <= timedelta(0):
+            return False
+        fetched_at = self.known_jobs.get(self._normalize_job_url(href))
+        if fetched_at is None or pd.isna(fetched_at):
+            return False
+        return datetime.now() - fetched_at < self.known_ttl
+
+    def _save_job(self, job_url: str, job_details: dict):
+        """
+        写入一条职位数据，并在进度日志中标记为已完成。
+        记录进度前先将CSV行 fsync，再追加并 fsync 进度日志，保证日志中已完成的职位一定已写入文件。
+        """
+        list_fields = self.list_fields.get(job_details["bossURL"], {})
+        for name, value in list_fields.items():
+            if job_details.get(name) in (None, "", "N/A"):
+                job_details[name] = value
+        with self.metrics.stage("csv_write"):
+            self.data_manager.append_to_csv(job_details)
+            if self.journal is not None:
+                self.data_manager.sync()
+                self.journal.mark_done(self._normalize_job_url(job_url))
+        self.metrics.milestone("first_job")
+
+    def _visit_jobs_sequential(self, urls_to_visit: list) -> int:
+        """
+        逐个访问详情页，提取信息并写入CSV，返回成功提取的条数。
+        """
         count_job_data = 0
-        page_number = 1
+        for i, job_url in enumerate(urls_to_visit):
+            # 自适应间隔，防止请求过快
+            self.throttle.wait()
+            # Playwright的base_url会自动处理拼接
+            logger.info(f"正在访问第 {i+1}/{len(urls_to_visit)} 个职位: {job_url}")
+            job_page = self.page.context.new_page()
+            start = time.monotonic()
+            try:
+                with self.metrics.stage("detail_goto"):
+                    job_page.goto(job_url)
+                with self.metrics.stage("detail_wait_for_load"):
+                    job_page.wait_for_load_state("domcontentloaded")
+                self._record_page_load(job_page, time.monotonic() - start)
+                job_details = self._extract_job_details(job_page)
+                if job_details:
+                    self._save_job(job_url, job_details)
+                    count_job_data += 1
+                    self.metrics.incr("detail_success")
+                else:
+                    self.metrics.incr("detail_failure")
+            except Exception as e:
+                self.metrics.incr("detail_failure")
+                logger.info(f"访问或处理页面 {job_url} 时出错: {e}")
+            finally:
+                # 确保页面被关闭
+                job_page.close()
+        return count_job_data
+
+    def _visit_jobs_concurrent(self, urls_to_visit: list) -> int:
+        """
+        以页面池方式并发访问详情页，返回成功提取的条数。
+        最多同时有 concurrency 个详情页处于加载中，每次发起请求前经过全局限速器；
+        页面按入队顺序依次提取，因此写入 DataManager 的顺序与列表顺序一致。
+        """
+        context = self.page.context
+        in_flight = deque()
+        count_job_data = 0
+
+        for i, job_url in enumerate(urls_to_visit):
+            # 池已满时，先处理最早发起的页面，腾出位置
+            if len(in_flight) >= self.concurrency:
+                count_job_data += self._harvest_job_page(*in_flight.popleft())
+
+            self.throttle.wait()
+            self.rate_limiter.acquire()
+            logger.info(f"正在访问第 {i+1}/{len(urls_to_visit)} 个职位: {job_url}")
+            job_page = context.new_page()
+            start = time.monotonic()
+            try:
+                # 通过脚本触发跳转而不等待加载完成，让多个详情页在浏览器中并行加载
+                # (base_url 只对 goto 生效，这里需要手动拼接为绝对地址)
+                with self.metrics.stage("detail_goto"):
+                    job_page.evaluate(
+                        "url => { window.location.href = url; }",
+                        urljoin(self.interested_url, job_url),
+                    )
+            except Exception as e:
+                self.metrics.incr("detail_failure")
+                logger.info(f"访问页面 {job_url} 时出错: {e}")
+                job_page.close()
+                continue
+            in_flight.append((job_url, job_page, start))
+
+        while in_flight:
+            count_job_data += self._harvest_job_page(*in_flight.popleft())
+
+        return count_job_data
+
+    def _harvest_job_page(self, job_url: str, job_page: Page, start: float) -> int:
+        """
+        等待已发起跳转的详情页加载完成，提取信息并写入CSV，随后关闭页面。
+        成功返回 1，否则返回 0。
+        """
+        try:
+            with self.metrics.stage("detail_wait_for_load"):
+                job_page.wait_for_url(
+                    lambda url: not url.startswith("about:"),
+                    wait_until="domcontentloaded",
+                )
+            self._record_page_load(job_page, self._navigation_latency(job_page, start))
+            job_details = self._extract_job_details(job_page)
+            if job_details:
+                self._save_job(job_url, job_details)
+                self.metrics.incr("detail_success")
+                return 1
+            self.metrics.incr("detail_failure")
+        except Exception as e:
+            self.metrics.incr("detail_failure")
+            logger.info(f"访问或处理页面 {job_url} 时出错: {e}")
+        finally:
+            job_page.close()
+        return 0
+
+    def _navigation_latency(self, page: Page, start: float) -> float:
+        """
+        返回页面自身的加载耗时 (秒)，取自 Navigation Timing。
+        并发模式下页面在池中等待被处理的时间不应计入，否则自适应间隔只会不断加倍；
+        读取失败时退回为从发起跳转到现在的耗时。
+        """
+        try:
+            dcl_ms = page.evaluate(NAVIGATION_DCL_JS)
+        except Exception:
+            dcl_ms = None
+        if dcl_ms is None:
+            return time.monotonic() - start
+        return dcl_ms / 1000
+
+    def _record_page_load(self, page: Page, latency: float):
+        """
+        将一次页面加载的耗时和是否触发安全验证反馈给自适应间隔。
+        """
+        security_check = page.url.startswith(BOSS_SECURITY_CHECK_URL)
+        if security_check:
+            self.metrics.incr("security_redirect")
+            logger.info(f"页面被重定向到安全验证，放慢请求速度。当前URL: {page.url}")
+        self.throttle.record(latency, security_check)
+
+    def _first_job_href(self) -> str:
+        link = self.page.locator(FIRST_JOB_LINK_SELECTOR).first
+        return link.get_attribute("href") if link.count() else None
+
+    def _wait_for_job_list(self, previous_first_href: str = None):
+        """
+        等待职位列表渲染完成。翻页时等待第一个职位链接与翻页前不同，
+        代替固定时长的 sleep。列表为空或超时时直接继续，由后续逻辑判断。
+        """
+        self.page.wait_for_selector("ul.user-jobs-ul", timeout=30000)
+        try:
+            self.page.wait_for_function(
+                """prev => {
+                    const link = document.querySelector(%r);
+                    return link !== null && link.getAttribute("href") !== prev;
+                }"""
+                % FIRST_JOB_LINK_SELECTOR,
+                arg=previous_first_href,
+                timeout=10000,
+            )
+        except Exception:
+            logger.info("等待职位列表刷新超时，继续处理当前页面。")
+
+    def _process_job_list(self, page_number: int, hrefs: list):
+        """
+        处理一页列表中的职位链接：过滤掉已完成或近期已爬取的职位，记录进度后访问详情页。
+        """
+        urls_to_visit = []
+        for href in hrefs:
+            if not href:
+                continue
+            normalized = self._normalize_job_url(href)
+            if normalized in self.seen_urls:
+                continue
+            self.seen_urls.add(normalized)
+            if self.journal is not None and self.journal.is_done(normalized):
+                self.count_resumed += 1
+                continue
+            if self._is_known_fresh(href):
+                self.count_skipped += 1
+                continue
+            urls_to_visit.append(href)
+
+        logger.info(
+            f"本页需访问 {len(urls_to_visit)} 个职位，"
+            f"累计跳过 {self.count_skipped} 个近期已爬取的职位，"
+            f"{self.count_resumed} 个上次已完成的职位。"
+        )
+        if self.journal is not None:
+            self.journal.start_page(page_number, urls_to_visit)
+        if self.concurrency > 1:
+            self.count_job_data += self._visit_jobs_concurrent(urls_to_visit)
+        else:
+            self.count_job_data += self._visit_jobs_sequential(urls_to_visit)
+
+    def _scrape_list_dom(self):
+        """
+        DOM 方式：从渲染后的列表中读取职位链接，点击“下一页”按钮翻页。
+        恢复时通过列表页地址中的 page 参数直接打开进度日志中记录的页。
+        """
+        page_number = self._start_page_number()
+        url = self.interested_url
+        if page_number > 1:
+            url = set_query_param(url, "page", page_number)
+        self.page.goto(url)
+        logger.info(f"已打开页面: {self.page.url}")
+
+        previous_first_href = None
 
         while True:
             logger.info(f"\n--- 正在处理第 {page_number} 页 ---")
             # 等待职位列表加载完成
-            self.page.wait_for_selector("ul.user-jobs-ul", timeout=30000)
-            time.sleep(2)  # 增加延时以确保JS渲染完成
+            list_start = time.monotonic()
+            with self.metrics.stage("list_page_load"):
+                self._wait_for_job_list(previous_first_href)
+            self._record_page_load(self.page, time.monotonic() - list_start)
 
             # **【修正】使用您提供的HTML结构来定位职位链接**
             # 1. 定位包含所有职位信息的 li 列表
@@ -178,32 +672,13 @@ class JobScraper:
                 break
 
             # 提取当前页所有链接，之后再统一访问，避免在循环中操作页面导致元素失效
-            urls_to_visit = []
-            for item in job_list_items:
-                # 2. 在每个 li 内部找到职位详情的 a 标签
-                link_element = item.locator("div.job-name a.name")
-                href = link_element.get_attribute("href")
-                if href:
-                    urls_to_visit.append(href)
-
-            # 逐个访问详情页
-            for i, job_url in enumerate(urls_to_visit):
-                # Playwright的base_url会自动处理拼接
-                logger.info(f"正在访问第 {i+1}/{len(urls_to_visit)} 个职位: {job_url}")
-                job_page = self.page.context.new_page()
-                try:
-                    job_page.goto(job_url)
-                    job_page.wait_for_load_state("domcontentloaded")
-                    job_details = self._extract_job_details(job_page)
-                    if job_details:
-                        self.data_manager.append_to_csv(job_details)
-                        count_job_data += 1
-                except Exception as e:
-                    logger.info(f"访问或处理页面 {job_url} 时出错: {e}")
-                finally:
-                    # 确保页面被关闭
-                    job_page.close()
-                time.sleep(1)  # 礼貌性延时，防止请求过快
+            with self.metrics.stage("link_collection"):
+                hrefs = [
+                    # 2. 在每个 li 内部找到职位详情的 a 标签
+                    item.locator("div.job-name a.name").get_attribute("href")
+                    for item in job_list_items
+                ]
+            self._process_job_list(page_number, hrefs)
 
             # 【分页逻辑】
             next_page_button = self.page.locator(
@@ -224,8 +699,158 @@ class JobScraper:
                 break
             else:
                 logger.info("点击“下一页”...")
+                previous_first_href = self._first_job_href()
+                self.throttle.wait()
                 next_page_button.click()
                 page_number += 1
 
-        logger.info(f"\n--- 所有页面访问完毕，共提取 {count_job_data} 条数据 ---")
-        return count_job_data
+    def _fetch_list_api(self, api_url: str) -> dict:
+        """
+        在页面内请求列表接口 (携带页面的 cookies)，返回JSON数据。
+        """
+        return self.page.evaluate(
+            """async url => {
+                const response = await fetch(url, {credentials: "include"});
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return await response.json();
+            }""",
+            api_url,
+        )
+
+    def _scrape_list_api(self) -> bool:
+        """
+        接口方式：截获页面自身请求的列表接口JSON，直接读取职位ID、链接和列表字段；
+        后续页面修改接口URL中的页码在页面内请求，不依赖渲染和点击翻页按钮。
+        任一页数据获取或解析失败时返回 False，由调用方退回 DOM 方式继续 (已处理的职位不会重复访问)。
+        """
+        list_start = time.perf_counter()
+        try:
+            with self.page.expect_response(
+                lambda r: self.list_api_pattern in r.url and r.status == 200,
+                timeout=30000,
+            ) as response_info:
+                self.page.goto(self.interested_url)
+            response = response_info.value
+            api_url = response.url
+            payload = response.json()
+        except Exception as e:
+            logger.info(f"未能截获列表接口数据: {e}")
+            return False
+        self.metrics.observe("list_page_load", time.perf_counter() - list_start)
+        logger.info(f"已截获列表接口: {api_url}")
+
+        page_number = self._start_page_number()
+        if page_number > 1:
+            # 恢复时直接请求进度日志中记录的页
+            try:
+                payload = self._fetch_list_api(set_query_param(api_url, "page", page_number))
+            except Exception as e:
+                logger.info(f"请求列表接口第 {page_number} 页时出错: {e}")
+                return self._list_api_failed(page_number)
+        while True:
+            logger.info(f"\n--- 正在处理第 {page_number} 页 (接口) ---")
+            try:
+                with self.metrics.stage("link_collection"):
+                    jobs, has_more = parse_list_payload(payload)
+            except Exception as e:
+                logger.info(f"解析列表接口第 {page_number} 页数据时出错: {e}")
+                return self._list_api_failed(page_number)
+            logger.info(f"当前页面找到了 {len(jobs)} 个职位。")
+            if not jobs:
+                logger.info("当前页面没有找到职位，爬取结束。")
+                break
+
+            for job in jobs:
+                self.list_fields[self._normalize_job_url(job["href"])] = job["fields"]
+            self._process_job_list(page_number, [job["href"] for job in jobs])
+
+            if not has_more:
+                logger.info("列表接口显示没有更多数据，已到达最后一页。")
+                break
+
+            page_number += 1
+            next_api_url = set_query_param(api_url, "page", page_number)
+            self.throttle.wait()
+            list_start = time.monotonic()
+            try:
+                with self.metrics.stage("list_page_load"):
+                    payload = self._fetch_list_api(next_api_url)
+            except Exception as e:
+                logger.info(f"请求列表接口第 {page_number} 页时出错: {e}")
+                self.throttle.record(time.monotonic() - list_start, security_check=True)
+                return self._list_api_failed(page_number)
+            self.throttle.record(time.monotonic() - list_start)
+        return True
+
+    def _start_page_number(self) -> int:
+        """
+        列表的起始页码：恢复时为进度日志中记录的最后开始处理的页，该页中已完成的职位会被跳过。
+        """
+        return self.journal.page_number if self.journal is not None else 1
+
+    def _list_api_failed(self, page_number: int) -> bool:
+        """
+        接口方式在某一页失败时记录下来。第一页之后的失败意味着接口方式读到的列表不完整，
+        单独计数，便于在运行指标中发现。始终返回 False，由调用方退回 DOM 方式。
+        """
+        if page_number > 1:
+            self.metrics.incr("list_api_truncated")
+            logger.info(f"接口方式在第 {page_number} 页中断，前 {page_number - 1} 页已处理。")
+        return False
+
+    def scrape_interested_jobs(self):
+        """
+        打开“感兴趣”页面，使用正确的选择器自动翻页遍历所有JD，提取信息并返回
+        """
+        logger.info("\n--- 开始爬取“感兴趣”的职位 ---")
+
+        self.count_job_data = 0
+        self.count_skipped = 0
+        self.count_resumed = 0
+        self.seen_urls = set()
+
+        if self.journal is not None and self.journal.done:
+            pending = [
+                url
+                for url in self.journal.queued
+                if not self.journal.is_done(self._normalize_job_url(url))
+            ]
+            logger.info(
+                f"从进度日志恢复：上次中断于第 {self.journal.page_number} 页 "
+                f"(该页还有 {len(pending)} 个职位未完成)，已完成 {len(self.journal.done)} 个职位，"
+                f"从该页继续。"
+            )
+
+        # 加载总表中已知职位的索引，未过期的职位不再访问详情页
+        if self.known_ttl > timedelta(0):
+            self.known_jobs = self.data_manager.load_known_jobs()
+
+        if self.list_source == "api":
+            if not self._scrape_list_api():
+                # 已处理过的职位记录在 seen_urls 中，DOM 方式不会重复访问
+                logger.info("接口方式失败，退回 DOM 方式读取列表。")
+                self.metrics.incr("list_api_fallback_to_dom")
+                self._scrape_list_dom()
+        else:
+            self._scrape_list_dom()
+
+        if self.extraction_times:
+            logger.info(
+                f"详情页提取耗时 ({self.extraction_mode} 模式): "
+                f"平均 {sum(self.extraction_times) / len(self.extraction_times):.0f} ms，"
+                f"最长 {max(self.extraction_times):.0f} ms，共 {len(self.extraction_times)} 页"
+            )
+        if self.journal is not None:
+            self.journal.finish()
+        self._log_page_stats_summary()
+        logger.info(self.throttle.summary())
+        self.metrics.incr("jobs_extracted", self.count_job_data)
+        self.metrics.incr("jobs_skipped_known", self.count_skipped)
+        self.metrics.incr("jobs_skipped_resumed", self.count_resumed)
+        logger.info(
+            f"\n--- 所有页面访问完毕，共提取 {self.count_job_data} 条数据，"
+            f"跳过 {self.count_skipped} 条近期已爬取的数据 ---"
+        )
+        return self.count_job_data
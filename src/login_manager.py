@@ -1,7 +1,6 @@
 # login_manager.py
 
-import time
-import json, os
+import json, os, time
 
 from patchright.sync_api import Page, expect
 from config import (
@@ -10,6 +9,10 @@ from config import (
     BOSS_LOGIN_URL,
     BOSS_RECOMMEND_URL,
     BOSS_SECURITY_CHECK_URL,
+    LOGGED_IN_SELECTOR,
+    LOGGED_IN_TIMEOUT,
+    SESSION_COOKIE_NAMES,
+    SESSION_EXPIRY_MARGIN,
 )
 
 
@@ -18,10 +21,15 @@ class LoginManager:
     处理BOSS直聘网站登录的类
     """
 
-    def __init__(self, page: Page):
+    def __init__(
+        self, page: Page, cookies_file: str = "cookies.json", storage_state_file: str = None
+    ):
         """
         初始化 LoginManager
         :param page: Playwright 的 Page 对象
+        :param cookies_file: 保存登录状态的文件，多账号时每个账号使用各自的文件
+        :param storage_state_file: 登录后同时保存完整的 storage_state (cookies + localStorage)，
+                                   下次创建浏览器上下文时可直接恢复
         """
         self.page = page
         self.base_url = BOSS_BASE_URL
@@ -31,7 +39,8 @@ class LoginManager:
 
         # saved cookies for login persistence
         self.cookies = []
-        self.cookies_file = "cookies.json"
+        self.cookies_file = cookies_file
+        self.storage_state_file = storage_state_file
 
     def load_cookies_from_file(self):
         """
@@ -61,7 +70,50 @@ class LoginManager:
             json.dump(self.cookies, f)
         logger.info("Cookies 已保存。")
 
-    def _close_email_popup(self):
+    def save_session(self):
+        """
+        保存 cookies 文件，并按需保存 storage_state。
+        """
+        self.save_cookies_to_file()
+        if self.storage_state_file:
+            self.page.context.storage_state(path=self.storage_state_file)
+            logger.info(f"登录状态已保存到 {self.storage_state_file}。")
+
+    @staticmethod
+    def _session_cookies_valid(cookies: list) -> bool:
+        """
+        本地检查登录凭证 cookie：存在且都未过期 (会话 cookie 的 expires 为 -1，视为有效)。
+        """
+        session_cookies = [c for c in cookies if c.get("name") in SESSION_COOKIE_NAMES]
+        if not session_cookies:
+            return False
+        deadline = time.time() + SESSION_EXPIRY_MARGIN
+        return all(c.get("expires", -1) < 0 or c["expires"] > deadline for c in session_cookies)
+
+    def has_valid_local_session(self) -> bool:
+        """
+        不访问网站，检查本地保存的登录状态是否可能有效。
+        浏览器上下文中已有的 cookies (配置目录或 storage_state 恢复的) 优先，没有时加载 cookies 文件。
+        """
+        if self._session_cookies_valid(self.page.context.cookies()):
+            return True
+        self.load_cookies_from_file()
+        return self._session_cookies_valid(self.cookies)
+
+    def _is_logged_in_page(self) -> bool:
+        return self.recommend_url in self.page.url or self.security_url in self.page.url
+
+    def _wait_visible(self, selector: str, timeout: int = 3000) -> bool:
+        """
+        等待元素可见，超时返回 False 而不抛出异常。
+        """
+        try:
+            self.page.locator(selector).first.wait_for(state="visible", timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def _close_email_popup(self, timeout: int = 5000):
         """
         检测并关闭“设置邮箱”弹窗
         """
@@ -70,7 +122,7 @@ class LoginManager:
                 "div.dialog-container:has-text('尚未设置邮箱验证')"
             )
 
-            popup_locator.wait_for(state="visible", timeout=5000)
+            popup_locator.wait_for(state="visible", timeout=timeout)
 
             logger.info("检测到“设置邮箱”弹窗，正在关闭...")
             close_button = popup_locator.locator("i.icon-close")
@@ -81,10 +133,26 @@ class LoginManager:
 
     def login(self):
         """
-        执行登录操作，通过扫描二维码登录
+        执行登录操作，通过扫描二维码登录。
+        本地登录凭证未过期时直接打开推荐页验证 (不等待 networkidle)，
+        只有登录状态确实失效时才打开登录页。
         """
+        if self.has_valid_local_session():
+            logger.info("本地登录凭证未过期，直接打开推荐页验证...")
+            self.page.goto(self.recommend_url, wait_until="domcontentloaded")
+            # 等待已登录用户的页头出现，有效时立即继续；登录失效时页面会跳转到登录页，等待超时
+            if self._wait_visible(LOGGED_IN_SELECTOR, timeout=LOGGED_IN_TIMEOUT) or (
+                self.security_url in self.page.url
+            ):
+                logger.info("登录状态有效，跳过登录页。")
+                self.save_session()
+                self._close_email_popup(timeout=2000)
+                return
+            logger.info(f"登录状态已失效，当前URL: {self.page.url}")
+        else:
+            logger.info("本地没有有效的登录凭证。")
+
         logger.info("正在打开登录页面...")
-        self.load_cookies_from_file()
         self.page.goto(self.login_url)
         self.page.wait_for_load_state("networkidle")
 
@@ -115,18 +183,19 @@ class LoginManager:
                 # if qr_login_button is .btn-sign-switch.ewm-switch
                 # click once, otherwise if it is .btn-sign-switch.phone-switch
                 # click twice to switch to QR code login
-                time.sleep(1)
+                # 等待任一切换按钮出现，代替固定时长的 sleep
+                self._wait_visible(
+                    ".btn-sign-switch.phone-switch, .btn-sign-switch.ewm-switch"
+                )
                 # 检查是否有二维码登录按钮
                 phone_switch_button = self.page.locator(".btn-sign-switch.phone-switch")
                 if phone_switch_button.is_visible():
                     logger.info("切换到二维码登录...")
                     phone_switch_button.click()
-                    time.sleep(1)
                     qr_login_button = self.page.locator(".btn-sign-switch.ewm-switch")
-                    if qr_login_button.is_visible():
+                    if self._wait_visible(".btn-sign-switch.ewm-switch"):
                         qr_login_button.click()
-                        time.sleep(2)
-                        if self.page.locator(".qr-img-box").is_visible():
+                        if self._wait_visible(".qr-img-box"):
                             is_qr_code = True
                             break
                 else:
@@ -134,8 +203,7 @@ class LoginManager:
                     if qr_login_button.is_visible():
                         logger.info("切换到二维码登录...")
                         qr_login_button.click()
-                        time.sleep(2)
-                        if self.page.locator(".qr-img-box").is_visible():
+                        if self._wait_visible(".qr-img-box"):
                             is_qr_code = True
                             break
             return is_qr_code
@@ -168,7 +236,7 @@ class LoginManager:
                 phone_switch_button = self.page.locator(".btn-sign-switch.phone-switch")
                 if phone_switch_button.is_visible():
                     phone_switch_button.click()  # 切换回密码登录
-                    time.sleep(0.5)
+                    self._wait_visible(".btn-sign-switch.ewm-switch")
                     self.page.locator(
                         ".btn-sign-switch.ewm-switch"
                     ).click()  # 再次切换回二维码登录以刷新
@@ -179,9 +247,9 @@ class LoginManager:
                 # 在循环的下一次迭代中，将重新等待扫描
 
         # 最终确认是否真的跳转成功
-        if self.recommend_url in self.page.url or self.security_url in self.page.url:
+        if self._is_logged_in_page():
             logger.info(f"已成功登录并跳转到页面: {self.recommend_url}")
-            self.save_cookies_to_file()
+            self.save_session()
             self._close_email_popup()
         else:
             raise Exception("登录失败，未能跳转到指定页面。当前url: " + self.page.url)
@@ -1,41 +1,241 @@
 # main.py
 
+import argparse
+import multiprocessing
+import os
 from patchright.sync_api import sync_playwright
 from job_scraper import JobScraper
 from login_manager import LoginManager
+from crawl_journal import CrawlJournal
 from data_manager import DataManager
+from html_archive import HtmlArchive
+from metrics import CrawlMetrics
+from resource_blocker import ResourceBlocker
 from datetime import datetime
 
-from config import logger, BOSS_BASE_URL
+from config import (
+    logger,
+    BOSS_BASE_URL,
+    ARCHIVE_HTML,
+    BROWSER_PROFILE_DIR,
+    HTML_ARCHIVE_DIR,
+    LIGHTWEIGHT_MODE,
+    CRAWL_JOURNAL_FILE,
+    METRICS_REPORT_DIR,
+    STORAGE_STATE_FILE,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="爬取BOSS直聘“感兴趣”的职位")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从上次中断的位置继续，数据追加到上次运行的CSV文件中",
+    )
+    parser.add_argument(
+        "--accounts",
+        nargs="+",
+        metavar="NAME",
+        help="分片模式：每个账号在独立的浏览器进程中使用各自的 cookies_<NAME>.json 爬取，结束后合并",
+    )
+    return parser.parse_args()
+
+
+def open_journal(resume: bool) -> CrawlJournal:
+    """
+    --resume 时读取未完成的进度日志，否则为新的运行创建进度日志。
+    """
+    if resume:
+        journal = CrawlJournal.load(CRAWL_JOURNAL_FILE)
+        if journal is not None and not journal.finished:
+            logger.info(f"将继续上次未完成的爬取: {journal.run_csv}")
+            return journal
+        logger.info("没有找到未完成的爬取，将开始新的爬取。")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"boss直聘_感兴趣职位_{timestamp}.csv"
+    return CrawlJournal.create(CRAWL_JOURNAL_FILE, filename)
+
+
+def open_browser_context(p, profile_dir: str = None, storage_state_file: str = None):
+    """
+    打开浏览器上下文，返回 (context, page)。
+    指定 profile_dir 时使用持久化的浏览器配置目录，登录状态、HTTP缓存、Service Worker
+    和 localStorage 在多次运行之间保留；否则启动新的浏览器，并从 storage_state 文件恢复登录状态。
+    """
+    if profile_dir:
+        context = p.chromium.launch_persistent_context(
+            profile_dir, headless=False, channel="chrome", base_url=BOSS_BASE_URL
+        )
+    else:
+        browser = p.chromium.launch(headless=False, channel="chrome")
+        state = (
+            storage_state_file
+            if storage_state_file and os.path.exists(storage_state_file)
+            else None
+        )
+        context = browser.new_context(base_url=BOSS_BASE_URL, storage_state=state)
+    page = context.pages[0] if context.pages else context.new_page()
+    return context, page
+
+
+def close_browser_context(context):
+    """关闭浏览器上下文；非持久化模式下同时关闭浏览器。"""
+    browser = context.browser
+    context.close()
+    if browser is not None:
+        browser.close()
+
+
+def log_startup_times(metrics: CrawlMetrics):
+    """输出冷启动各节点的耗时 (浏览器就绪、登录完成、写入第一条职位)。"""
+    milestones = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in metrics.milestones.items())
+    if milestones:
+        logger.info(f"冷启动耗时: {milestones}")
+
+
+def run_shard(account: str, shard_filename: str):
+    """
+    分片进程：使用指定账号的会话爬取该账号的“感兴趣”列表，写入分片CSV。
+    """
+    metrics = CrawlMetrics(name=account)
+    count_job_data = 0
+    storage_state_file = f"{os.path.splitext(STORAGE_STATE_FILE)[0]}_{account}.json"
+    with sync_playwright() as p:
+        context, page = open_browser_context(
+            p,
+            f"{BROWSER_PROFILE_DIR}_{account}" if BROWSER_PROFILE_DIR else None,
+            storage_state_file,
+        )
+        metrics.milestone("browser_ready")
+        try:
+            # 分片进程不写全文索引，避免多个进程同时写入同一个索引文件，合并分片时统一写入
+            with DataManager(shard_filename, use_search_index=False) as data_manager:
+                login_manager = LoginManager(
+                    page,
+                    cookies_file=f"cookies_{account}.json",
+                    storage_state_file=storage_state_file,
+                )
+                with metrics.stage("login"):
+                    login_manager.login()
+                metrics.milestone("logged_in")
+
+                resource_blocker = None
+                if LIGHTWEIGHT_MODE:
+                    resource_blocker = ResourceBlocker()
+                    resource_blocker.install(context)
+
+                scraper = JobScraper(
+                    page, data_manager, resource_blocker=resource_blocker, metrics=metrics
+                )
+                count_job_data = scraper.scrape_interested_jobs()
+                logger.info(f"[{account}] 分片完成，共提取 {count_job_data} 条数据。")
+                log_startup_times(metrics)
+        except Exception as e:
+            logger.info(f"[{account}] 发生错误: {e}")
+        finally:
+            close_browser_context(context)
+            metrics.write_report(
+                METRICS_REPORT_DIR, latest=False, run_csv=shard_filename, jobs=count_job_data
+            )
+
+
+def main_sharded(accounts: list):
+    """
+    分片模式：每个账号一个浏览器进程并行爬取，全部结束后将分片合并到同一个运行文件。
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"boss直聘_感兴趣职位_{timestamp}.csv"
+    shard_filenames = [
+        os.path.join("shards", f"boss直聘_感兴趣职位_{timestamp}_{account}.csv")
+        for account in accounts
+    ]
+
+    processes = [
+        multiprocessing.Process(
+            target=run_shard, args=(account, shard_filename), name=f"shard-{account}"
+        )
+        for account, shard_filename in zip(accounts, shard_filenames)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"已启动 {len(processes)} 个分片进程: {', '.join(accounts)}")
+    for process in processes:
+        process.join()
+
+    with DataManager(filename) as data_manager:
+        count_job_data = data_manager.merge_shards(
+            [os.path.join("boss_data", f) for f in shard_filenames]
+        )
+        if count_job_data > 0:
+            data_manager.convert_csv_to_json()
+            data_manager.write_columnar()
+            data_manager.update_master_file()
+            logger.info(
+                f"成功提取 {count_job_data} 条感兴趣的职位数据，已保存到 {filename}"
+            )
+    logger.info("\n所有流程完成。")
 
 
 def main():
+    args = parse_args()
+    if args.accounts:
+        main_sharded(args.accounts)
+        return
+    # 从这里开始计时，报告中的 milestones_s.first_job 即冷启动到第一条职位的耗时
+    metrics = CrawlMetrics()
     with sync_playwright() as p:
-        # 使用内置的 chromium
-        browser = p.chromium.launch(headless=False, channel="chrome")
-        context = browser.new_context(base_url=BOSS_BASE_URL)
-        page = context.new_page()
+        # 使用本机的 Chrome，持久化配置目录保留登录状态和缓存
+        context, page = open_browser_context(p, BROWSER_PROFILE_DIR, STORAGE_STATE_FILE)
+        metrics.milestone("browser_ready")
+        html_archive = HtmlArchive(HTML_ARCHIVE_DIR) if ARCHIVE_HTML else None
 
+        filename = None
+        count_job_data = 0
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"boss直聘_感兴趣职位_{timestamp}.csv"
-            data_manager = DataManager(filename)
-
-            # 1. 登录
-            login_manager = LoginManager(page)
-            login_manager.login()
-
-            # 2. 爬取感兴趣的职位
-            scraper = JobScraper(page, data_manager)
-            count_job_data = scraper.scrape_interested_jobs()
-
-            # 3. (下一步) 处理数据和保存
-            if count_job_data > 0:
-                data_manager.convert_csv_to_json()
-                data_manager.update_master_file()
-                logger.info(
-                    f"成功提取 {count_job_data} 条感兴趣的职位数据，已保存到 {filename}"
+            try:
+                journal = open_journal(args.resume)
+                filename = journal.run_csv
+                with DataManager(filename) as data_manager:
+                    # 1. 登录
+                    login_manager = LoginManager(page, storage_state_file=STORAGE_STATE_FILE)
+                    with metrics.stage("login"):
+                        login_manager.login()
+                    metrics.milestone("logged_in")
+
+                    # 登录完成后再开启轻量模式，避免拦截登录二维码图片
+                    resource_blocker = None
+                    if LIGHTWEIGHT_MODE:
+                        resource_blocker = ResourceBlocker()
+                        resource_blocker.install(context)
+
+                    # 2. 爬取感兴趣的职位
+                    scraper = JobScraper(
+                        page,
+                        data_manager,
+                        html_archive=html_archive,
+                        resource_blocker=resource_blocker,
+                        journal=journal,
+                        metrics=metrics,
+                    )
+                    count_job_data = scraper.scrape_interested_jobs()
+
+                    # 3. (下一步) 处理数据和保存
+                    if count_job_data > 0 or journal.done:
+                        data_manager.convert_csv_to_json()
+                        data_manager.write_columnar()
+                        data_manager.update_master_file()
+                        logger.info(
+                            f"成功提取 {count_job_data} 条感兴趣的职位数据，已保存到 {filename}"
+                        )
+            finally:
+                # 中断或出错的运行同样写入报告，便于分析耗时
+                report_path = metrics.write_report(
+                    METRICS_REPORT_DIR, run_csv=filename, jobs=count_job_data
                 )
+                logger.info(f"运行报告已保存到 {report_path}")
+            log_startup_times(metrics)
             logger.info("\n所有流程完成。")
 
             input("按 Enter 键关闭浏览器...")
@@ -43,7 +243,9 @@ def main():
         except Exception as e:
             logger.info(f"发生错误: {e}")
         finally:
-            browser.close()
+            if html_archive is not None:
+                html_archive.close()
+            close_browser_context(context)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,405 @@
+# master_store.py
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import columnar
+from config import COLUMNAR_OUTPUT, DATA_DIR
+from salary import ensure_salary_columns
+
+
+class MasterStore:
+    """
+    以 bossURL 为主键的总表存储 (SQLite)。
+    每次运行只需按主键 upsert 本次的新数据，代价与新增行数成正比；
+    all.csv 仅在需要时导出。
+    jobs 表只保存每个职位的最新内容，内容变化时把变化的字段 (旧值/新值) 记入 history 表，
+    fingerprints 表保存每个职位的内容哈希，内容未变化的记录无需逐列比较，也不产生历史记录。
+    """
+
+    KEY = "bossURL"
+    # 比较记录是否变化时忽略的列
+    VOLATILE_COLUMNS = ("获取时间",)
+    # 不计入内容哈希和变更历史的列：获取时间，JD链接 (带有每次会话不同的 lid/securityId 参数，
+    # 职位由 bossURL 唯一确定)，以及由其他列计算得到的薪资数值列和相似职位簇编号
+    DERIVED_COLUMNS = (
+        "获取时间",
+        "JD链接",
+        "salary_min",
+        "salary_max",
+        "months",
+        "annual_estimate",
+        "salary_unit",
+        "cluster_id",
+    )
+    # 单条SQL中 IN 子句的参数个数上限
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path: str, columns: list):
+        """
+        :param db_path: SQLite 数据库文件路径
+        :param columns: 总表的列顺序，必须包含 bossURL
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.columns = []
+        self._ensure_columns(columns)
+        self._create_history_tables()
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _ensure_columns(self, columns: list):
+        """
+        建表，并为表中缺少的列执行 ALTER TABLE ADD COLUMN。
+        """
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS jobs ({self._quote(self.KEY)} TEXT PRIMARY KEY)"
+            )
+            existing = [row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")]
+            for column in columns:
+                if column not in existing:
+                    self.conn.execute(
+                        f"ALTER TABLE jobs ADD COLUMN {self._quote(column)} TEXT"
+                    )
+                    existing.append(column)
+        # 保持调用方给定的列顺序，表中多出的旧列放在最后
+        self.columns = list(columns) + [c for c in existing if c not in columns]
+
+    def _create_history_tables(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints (bossURL TEXT PRIMARY KEY, "
+                "content_hash TEXT NOT NULL, first_seen TEXT, last_changed TEXT)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, bossURL TEXT NOT NULL, "
+                "run TEXT, changed_at TEXT, field TEXT NOT NULL, old_value TEXT, new_value TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS history_url ON history (bossURL)")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS history_field ON history (field, changed_at)"
+            )
+
+    def content_hash(self, record: dict) -> str:
+        """
+        记录内容的哈希：只包含非空的、非派生的列，表中新增的空列不会改变已有记录的哈希。
+        """
+        content = {
+            c: v for c, v in record.items() if v and c != self.KEY and c not in self.DERIVED_COLUMNS
+        }
+        return hashlib.sha1(
+            json.dumps(content, ensure_ascii=False, sort_keys=True).encode()
+        ).hexdigest()
+
+    def _fetch_hashes(self, urls: list) -> dict:
+        hashes = {}
+        for i in range(0, len(urls), self.BATCH_SIZE):
+            batch = urls[i : i + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT bossURL, content_hash FROM fingerprints WHERE bossURL IN ({placeholders})",
+                batch,
+            )
+            hashes.update(cursor.fetchall())
+        return hashes
+
+    def split_older(self, rows: list) -> tuple:
+        """
+        按获取时间拆分记录：获取时间早于总表中同一职位的记录 (如重新提取的旧快照) 不应覆盖较新的数据。
+        :return: (可以写入的记录, 比总表中更旧的记录)
+        """
+        urls = list({row.get(self.KEY) for row in rows if row.get(self.KEY)})
+        stored = {}
+        for i in range(0, len(urls), self.BATCH_SIZE):
+            batch = urls[i : i + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT {self._quote(self.KEY)}, {self._quote('获取时间')} FROM jobs "
+                f"WHERE {self._quote(self.KEY)} IN ({placeholders})",
+                batch,
+            )
+            stored.update(cursor.fetchall())
+        current, older = [], []
+        for row in rows:
+            # 获取时间为 "YYYY-MM-DD HH:MM:SS" 格式，可直接按字符串比较
+            fetched_at = row.get("获取时间") or ""
+            (older if fetched_at < (stored.get(row.get(self.KEY)) or "") else current).append(row)
+        return current, older
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone() is None
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def _fetch_existing(self, urls: list) -> dict:
+        existing = {}
+        select_cols = ", ".join(self._quote(c) for c in self.columns)
+        for i in range(0, len(urls), self.BATCH_SIZE):
+            batch = urls[i : i + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT {select_cols} FROM jobs WHERE {self._quote(self.KEY)} IN ({placeholders})",
+                batch,
+            )
+            for row in cursor:
+                record = dict(zip(self.columns, row))
+                existing[record[self.KEY]] = record
+        return existing
+
+    def upsert(self, rows: list, run: str = "") -> dict:
+        """
+        按 bossURL 插入或更新记录，同一批次内重复的 URL 以最后一条为准。
+        内容哈希与上次相同的记录直接视为未变化；变化的记录逐列比较，变化的字段写入历史表。
+        :param rows: 字典列表，值会以文本形式保存
+        :param run: 本批数据的来源 (如运行文件名)，记录在历史表中
+        :return: {"inserted": n, "updated": n, "unchanged": n}
+        """
+        latest = {}
+        for row in rows:
+            url = row.get(self.KEY)
+            if url:
+                latest[url] = row
+
+        extra_columns = {c for row in latest.values() for c in row} - set(self.columns)
+        if extra_columns:
+            self._ensure_columns(self.columns + sorted(extra_columns))
+
+        records = {
+            url: {c: ("" if row.get(c) is None else str(row.get(c))) for c in self.columns}
+            for url, row in latest.items()
+        }
+        new_hashes = {url: self.content_hash(record) for url, record in records.items()}
+        old_hashes = self._fetch_hashes(list(records))
+        # 只有哈希不同 (或旧数据没有哈希) 的记录需要读取旧内容比较
+        existing = self._fetch_existing(
+            [url for url in records if old_hashes.get(url) != new_hashes[url]]
+        )
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        params = []
+        fingerprints = []
+        history = []
+        for url, record in records.items():
+            observed_at = record.get("获取时间") or now
+            old = existing.get(url)
+            if old_hashes.get(url) == new_hashes[url]:
+                stats["unchanged"] += 1
+            elif old is None:
+                stats["inserted"] += 1
+                fingerprints.append((url, new_hashes[url], observed_at, None))
+            else:
+                changed = [
+                    c
+                    for c in self.columns
+                    if c not in self.DERIVED_COLUMNS and (old.get(c) or "") != record[c]
+                ]
+                if changed:
+                    stats["updated"] += 1
+                    history.extend(
+                        (url, run, observed_at, c, old.get(c) or "", record[c]) for c in changed
+                    )
+                else:
+                    stats["unchanged"] += 1
+                fingerprints.append(
+                    (url, new_hashes[url], old.get("获取时间") or None, observed_at if changed else None)
+                )
+            # 即使内容未变化，也刷新获取时间等易变列
+            params.append([record[c] for c in self.columns])
+
+        if params:
+            names = ", ".join(self._quote(c) for c in self.columns)
+            placeholders = ", ".join("?" * len(self.columns))
+            updates = ", ".join(
+                f"{self._quote(c)} = excluded.{self._quote(c)}"
+                for c in self.columns
+                if c != self.KEY
+            )
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO jobs ({names}) VALUES ({placeholders}) "
+                    f"ON CONFLICT({self._quote(self.KEY)}) DO UPDATE SET {updates}",
+                    params,
+                )
+                # 旧数据首次计算哈希时 first_seen 取当时的获取时间，之后保持不变
+                self.conn.executemany(
+                    "INSERT INTO fingerprints (bossURL, content_hash, first_seen, last_changed) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT(bossURL) DO UPDATE SET "
+                    "content_hash = excluded.content_hash, "
+                    "last_changed = COALESCE(excluded.last_changed, fingerprints.last_changed)",
+                    fingerprints,
+                )
+                self.conn.executemany(
+                    "INSERT INTO history (bossURL, run, changed_at, field, old_value, new_value) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    history,
+                )
+        return stats
+
+    def update_columns(self, rows: list) -> int:
+        """
+        按 bossURL 更新已有记录的部分列，不插入新记录，也不改变其他列。
+        :param rows: 字典列表，除 bossURL 外的键为要更新的列
+        :return: 更新的行数
+        """
+        columns = sorted({c for row in rows for c in row} - {self.KEY})
+        if not columns:
+            return 0
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            self._ensure_columns(self.columns + missing)
+
+        assignments = ", ".join(f"{self._quote(c)} = ?" for c in columns)
+        params = [
+            ["" if row.get(c) is None else str(row.get(c)) for c in columns] + [row[self.KEY]]
+            for row in rows
+            if row.get(self.KEY)
+        ]
+        with self.conn:
+            cursor = self.conn.executemany(
+                f"UPDATE jobs SET {assignments} WHERE {self._quote(self.KEY)} = ?", params
+            )
+        return cursor.rowcount
+
+    def upsert_csv(self, csv_path: str) -> dict:
+        """
+        读取CSV文件并 upsert 到总表，历史记录中的来源为CSV文件名。
+        """
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            return self.upsert(list(csv.DictReader(f)), run=os.path.basename(csv_path))
+
+    def history(self, url: str) -> dict:
+        """
+        返回单个职位的变更历史，不存在时返回 None。
+        :return: {"bossURL", "first_seen", "last_changed", "current": 最新内容,
+                  "changes": [{"changed_at", "run", "field", "old", "new"}, ...] (按时间升序)}
+        """
+        current = self._fetch_existing([url]).get(url)
+        if current is None:
+            return None
+        fingerprint = self.conn.execute(
+            "SELECT first_seen, last_changed FROM fingerprints WHERE bossURL = ?", (url,)
+        ).fetchone() or (None, None)
+        cursor = self.conn.execute(
+            "SELECT changed_at, run, field, old_value, new_value FROM history "
+            "WHERE bossURL = ? ORDER BY changed_at, id",
+            (url,),
+        )
+        return {
+            self.KEY: url,
+            "first_seen": fingerprint[0],
+            "last_changed": fingerprint[1],
+            "current": current,
+            "changes": [
+                dict(zip(("changed_at", "run", "field", "old", "new"), row)) for row in cursor
+            ],
+        }
+
+    def recent_changes(self, field: str, days: float, limit: int = 500) -> list:
+        """
+        最近 days 天内指定字段发生变化的职位 (同一职位只返回最近一次变化)，按变化时间降序。
+        """
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        info_columns = [c for c in ("职位名称", "公司", "base地点", "薪资") if c in self.columns]
+        select_info = ", ".join(f"jobs.{self._quote(c)}" for c in info_columns)
+        cursor = self.conn.execute(
+            f"SELECT h.bossURL, h.changed_at, h.old_value, h.new_value, {select_info} "
+            f"FROM history h JOIN jobs ON jobs.{self._quote(self.KEY)} = h.bossURL "
+            f"WHERE h.field = ? AND h.changed_at >= ? AND h.id = ("
+            f"SELECT MAX(id) FROM history WHERE bossURL = h.bossURL AND field = h.field) "
+            f"ORDER BY h.changed_at DESC LIMIT ?",
+            (field, since, limit),
+        )
+        names = [self.KEY, "changed_at", "old", "new"] + info_columns
+        return [dict(zip(names, row)) for row in cursor]
+
+    def known_jobs(self) -> dict:
+        """
+        返回 {bossURL: 获取时间字符串}，只读取这两列。
+        """
+        cursor = self.conn.execute(
+            f"SELECT {self._quote(self.KEY)}, {self._quote('获取时间')} FROM jobs"
+        )
+        return dict(cursor.fetchall())
+
+    def read_dataframe(self, columns: list = None) -> pd.DataFrame:
+        """
+        读取总表为 DataFrame，可只读取指定的列。
+        """
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        select_cols = ", ".join(self._quote(c) for c in columns)
+        df = pd.read_sql_query(f"SELECT {select_cols} FROM jobs", self.conn)
+        # 与CSV读取结果保持一致：空字符串视为缺失值
+        return df.replace("", None)
+
+    def iter_dataframes(self, columns: list = None, chunk_size: int = 5000):
+        """
+        按 rowid 顺序分块读取总表，逐块产出 DataFrame，可只读取指定的列。
+        """
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        select_cols = ", ".join(self._quote(c) for c in columns)
+        for df in pd.read_sql_query(
+            f"SELECT {select_cols} FROM jobs ORDER BY rowid", self.conn, chunksize=chunk_size
+        ):
+            yield df.replace("", None)
+
+    def export_csv(self, csv_path: str, chunk_size: int = 5000) -> int:
+        """
+        将总表分批导出为CSV (UTF-8-SIG)，返回导出的行数。
+        """
+        select_cols = ", ".join(self._quote(c) for c in self.columns)
+        cursor = self.conn.execute(f"SELECT {select_cols} FROM jobs ORDER BY rowid")
+        tmp_path = csv_path + ".tmp"
+        total = 0
+        with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(self.columns)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                total += len(rows)
+        os.replace(tmp_path, csv_path)
+        return total
+
+    def export_columnar(self, path: str = None):
+        """
+        将总表导出为列式文件 (默认与数据库同名的 all.feather)，返回导出的行数。
+        网页优先读取列式文件，因此凡是修改了总表的操作都应调用此方法，以免列式文件过期。
+        未开启 COLUMNAR_OUTPUT 或未安装 pyarrow 时跳过，返回 None。
+        """
+        if not (COLUMNAR_OUTPUT and columnar.is_available()):
+            return None
+        df = ensure_salary_columns(self.read_dataframe())
+        columnar.write_dataframe(df, path or columnar.columnar_path(self.db_path))
+        return len(df)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    from data_manager import JOB_COLUMNS
+
+    args = sys.argv[1:]
+    if not args or args[0] != "export":
+        print("用法: python master_store.py export [csv_filename]")
+    else:
+        csv_file = args[1] if len(args) > 1 else os.path.join(DATA_DIR, "all.csv")
+        store = MasterStore(os.path.join(DATA_DIR, "all.db"), JOB_COLUMNS)
+        rows = store.export_csv(csv_file)
+        store.close()
+        print(f"已将总表导出到 {csv_file}，共 {rows} 条记录。")
@@ -0,0 +1,115 @@
+# metrics.py
+
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 直方图的桶上限 (毫秒)
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class CrawlMetrics:
+    """
+    爬取过程的分阶段耗时和计数器。
+    各阶段耗时汇总为直方图和分位数，运行结束时输出为 JSON 报告。
+    """
+
+    def __init__(self, name: str = "crawl"):
+        """
+        :param name: 报告名称，分片模式下为账号名
+        """
+        self.name = name
+        self.started_at = datetime.now()
+        self.start = time.monotonic()
+        self.durations = {}
+        self.counters = {}
+        self.milestones = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        统计一个阶段的耗时：with metrics.stage("extraction"): ...
+        阶段内抛出异常时同样记录耗时，并计入 <name>_error 计数器。
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incr(f"{name}_error")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        self.durations.setdefault(name, []).append(seconds * 1000)
+
+    def milestone(self, name: str):
+        """
+        记录从创建 CrawlMetrics (进程启动) 到首次到达某个节点的耗时 (秒)，同名节点只记录第一次。
+        如 first_job 即冷启动到写入第一条职位的时间。
+        """
+        if name not in self.milestones:
+            self.milestones[name] = round(time.monotonic() - self.start, 3)
+
+    def incr(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def _summarize(self, values: list) -> dict:
+        values = sorted(values)
+        buckets = {}
+        for bound in HISTOGRAM_BUCKETS_MS:
+            buckets[f"le_{bound}"] = sum(1 for v in values if v <= bound)
+        buckets["le_inf"] = len(values)
+        return {
+            "count": len(values),
+            "total_ms": round(sum(values), 1),
+            "mean_ms": round(sum(values) / len(values), 1) if values else 0.0,
+            "p50_ms": round(_percentile(values, 0.5), 1),
+            "p90_ms": round(_percentile(values, 0.9), 1),
+            "p99_ms": round(_percentile(values, 0.99), 1),
+            "max_ms": round(values[-1], 1) if values else 0.0,
+            "histogram": buckets,
+        }
+
+    def report(self, **extra) -> dict:
+        """
+        生成报告字典，extra 中的内容原样附加到报告中。
+        """
+        report = {
+            "name": self.name,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_s": round(time.monotonic() - self.start, 2),
+            "stages": {name: self._summarize(v) for name, v in self.durations.items()},
+            "counters": dict(self.counters),
+            "milestones_s": dict(self.milestones),
+        }
+        report.update(extra)
+        return report
+
+    def write_report(self, report_dir: str, latest: bool = True, **extra) -> str:
+        """
+        将报告写入 report_dir/run_<时间>_<名称>.json；latest 为 True 时同时更新 latest.json。
+        返回报告文件路径。
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        report = self.report(**extra)
+        timestamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(report_dir, f"run_{timestamp}_{self.name}.json")
+        targets = [path] + ([os.path.join(report_dir, "latest.json")] if latest else [])
+        for target in targets:
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, target)
+        return path
@@ -0,0 +1,362 @@
+# near_duplicates.py
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, MASTER_DB_FILENAME, NEAR_DUPLICATE_FILE, NEAR_DUPLICATE_THRESHOLD
+
+# 相似职位检测 (MinHash + LSH)。
+# 同一个职位经常以不同的 bossURL 重新发布，或由同一公司的不同HR发布，职位描述几乎相同。
+# 每条职位描述切分为字符片段 (shingle)，计算 MinHash 签名；签名按段 (band) 分桶，
+# 新记录只与至少一个段完全相同的记录比较，而不是与全部记录两两比较。
+# 估算相似度 (签名中相同位置的比例，近似 Jaccard 相似度) 达到阈值的记录归入同一簇，
+# 簇编号 cluster_id 为簇中最早一条记录的编号。
+
+# 参与比较的字段
+TEXT_COLUMN = "职位描述内容"
+# 字符片段长度，以及参与比较的最短文本 (去掉空白和标点后的字符数)，过短的描述不归簇
+SHINGLE_SIZE = 4
+MIN_TEXT_LENGTH = 30
+# 签名长度 = 段数 × 每段行数；16 × 8 时相似度约 0.7 以上的记录大概率落入同一个桶
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+# 每个桶中最多取出的候选记录数，避免大量相同模板的描述使比较次数随数据量平方增长
+MAX_BUCKET_CANDIDATES = 20
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# 固定种子：签名会持久化保存，每次运行必须使用相同的哈希函数
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白和标点并转为小写。"""
+    return "".join(_WORD_RE.findall(text.lower())) if isinstance(text, str) else ""
+
+
+def shingle_hashes(text: str):
+    """
+    将文本切分为长度为 SHINGLE_SIZE 的重叠字符片段，返回去重后的片段哈希 (uint64 数组)。
+    按字符编码批量计算多项式哈希，不为每个片段创建字符串。文本过短时返回 None。
+    """
+    normalized = normalize_text(text)
+    if len(normalized) < MIN_TEXT_LENGTH:
+        return None
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    count = len(codes) - SHINGLE_SIZE + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes = (hashes * np.uint64(1_000_003) + codes[offset : offset + count]) & _MAX_HASH
+    return np.unique(hashes)
+
+
+def minhash(text: str):
+    """
+    计算文本的 MinHash 签名 (NUM_PERM 个 uint32)，文本过短时返回 None。
+    """
+    hashes = shingle_hashes(text)
+    if hashes is None:
+        return None
+    values = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return values.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature) -> list:
+    """
+    将签名切分为 BANDS 段，每段哈希为一个桶编号 (64位整数)。
+    """
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def similarity(a, b) -> float:
+    """两个签名的估算相似度 (相同位置的比例)。"""
+    return float(np.mean(a == b))
+
+
+def collapse_clusters(df: pd.DataFrame, column: str = "cluster_id") -> pd.DataFrame:
+    """
+    每个簇只保留最后一条记录 (最近写入的)，并增加 duplicates 列记录簇内的记录数。
+    没有簇编号的记录各自单独保留。
+    """
+    if column not in df.columns:
+        return df
+    keys = df[column].astype(object)
+    keys = keys.where(keys.notna(), pd.Series(["#" + str(i) for i in range(len(df))], index=df.index))
+    sizes = keys.map(keys.value_counts())
+    keep = ~keys.duplicated(keep="last")
+    return df[keep].assign(duplicates=sizes[keep])
+
+
+class DuplicateIndex:
+    """
+    以 bossURL 为主键的 MinHash 签名和 LSH 分桶索引 (SQLite)，支持逐条增量加入。
+    加入的记录会立即参与之后记录的比较；写入在一个事务中累积，每 flush_rows 条或调用 flush() 时提交。
+    同时记录簇编号可能发生变化的簇，同步总表时只需更新这些簇中的记录。
+    """
+
+    def __init__(
+        self,
+        path: str = NEAR_DUPLICATE_FILE,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+        flush_rows: int = 1000,
+    ):
+        """
+        :param path: 索引文件路径 (SQLite)
+        :param threshold: 归入同一簇的最低估算相似度
+        :param flush_rows: 未提交的记录达到该条数时自动提交
+        """
+        self.path = path
+        self.threshold = threshold
+        self.flush_rows = flush_rows
+        self.uncommitted = 0
+        # 自上次 changed_assignments() 以来成员或编号发生变化的簇编号
+        self.changed_clusters = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 手动管理事务 (isolation_level=None)，写入前以 BEGIN IMMEDIATE 获取写锁，
+        # 其他进程持有写锁时最多等待 timeout 秒，而不是在读后升级写锁时直接报错
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, "
+                "bossURL TEXT UNIQUE NOT NULL, signature BLOB, cluster_id INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band INTEGER, bucket INTEGER, doc_id INTEGER)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, bucket)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS bands_doc ON bands (doc_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS docs_cluster ON docs (cluster_id)")
+
+    def _candidates(self, buckets: list, doc_id: int) -> dict:
+        candidates = {}
+        for band, bucket in enumerate(buckets):
+            cursor = self.conn.execute(
+                "SELECT docs.id, docs.signature, docs.cluster_id FROM bands "
+                "JOIN docs ON docs.id = bands.doc_id "
+                "WHERE bands.band = ? AND bands.bucket = ? AND bands.doc_id != ? LIMIT ?",
+                (band, bucket, doc_id, MAX_BUCKET_CANDIDATES),
+            )
+            for other_id, signature, cluster_id in cursor:
+                candidates[other_id] = (signature, cluster_id)
+        return candidates
+
+    def add(self, job_data: dict):
+        """
+        加入一条职位数据 (同一 bossURL 再次加入时按新的描述重新归簇)。
+        与已有的簇相似时归入该簇；同时与多个簇相似时将这些簇合并。
+        :return: 簇编号 (字符串)，没有 bossURL 时返回空字符串
+        """
+        url = job_data.get("bossURL")
+        if not url:
+            return ""
+        signature = minhash(job_data.get(TEXT_COLUMN))
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        # 每条记录一个保存点，出错时只撤销这一条，不影响同一事务中之前加入的记录
+        self.conn.execute("SAVEPOINT add_doc")
+        try:
+            cluster_id, changed = self._add(url, signature)
+        except Exception:
+            self.conn.execute("ROLLBACK TO add_doc")
+            self.conn.execute("RELEASE add_doc")
+            raise
+        self.conn.execute("RELEASE add_doc")
+        self.changed_clusters |= changed
+        self.uncommitted += 1
+        if self.uncommitted >= self.flush_rows:
+            self.flush()
+        return str(cluster_id)
+
+    def _add(self, url: str, signature) -> tuple:
+        """
+        :return: (簇编号, 成员或编号发生变化的簇编号集合)
+        """
+        blob = None if signature is None else signature.tobytes()
+        row = self.conn.execute(
+            "SELECT id, signature, cluster_id FROM docs WHERE bossURL = ?", (url,)
+        ).fetchone()
+        if row is not None and row[1] == blob:
+            return row[2], set()
+        changed = set()
+        if row is not None:
+            doc_id = row[0]
+            self.conn.execute("DELETE FROM bands WHERE doc_id = ?", (doc_id,))
+            if row[2] == doc_id:
+                # 该记录是所在簇的代表 (簇编号即其编号)，簇中其余记录改用剩下最早的一条作为簇编号
+                successor = self.conn.execute(
+                    "SELECT MIN(id) FROM docs WHERE cluster_id = ? AND id != ?", (doc_id, doc_id)
+                ).fetchone()[0]
+                if successor is not None:
+                    self.conn.execute(
+                        "UPDATE docs SET cluster_id = ? WHERE cluster_id = ? AND id != ?",
+                        (successor, doc_id, doc_id),
+                    )
+                    changed.add(successor)
+            self.conn.execute(
+                "UPDATE docs SET signature = ?, cluster_id = ? WHERE id = ?", (blob, doc_id, doc_id)
+            )
+        else:
+            doc_id = self.conn.execute(
+                "INSERT INTO docs (bossURL, signature, cluster_id) VALUES (?, ?, 0)", (url, blob)
+            ).lastrowid
+        cluster_id = doc_id
+
+        if signature is not None:
+            buckets = band_buckets(signature)
+            clusters = {
+                other_cluster
+                for other_signature, other_cluster in self._candidates(buckets, doc_id).values()
+                if similarity(signature, np.frombuffer(other_signature, dtype=np.uint32))
+                >= self.threshold
+            }
+            if clusters:
+                cluster_id = min(clusters | {doc_id})
+                merged = clusters - {cluster_id}
+                if merged:
+                    placeholders = ", ".join("?" * len(merged))
+                    self.conn.execute(
+                        f"UPDATE docs SET cluster_id = ? WHERE cluster_id IN ({placeholders})",
+                        [cluster_id, *merged],
+                    )
+            self.conn.executemany(
+                "INSERT INTO bands (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, bucket, doc_id) for band, bucket in enumerate(buckets)],
+            )
+        self.conn.execute("UPDATE docs SET cluster_id = ? WHERE id = ?", (cluster_id, doc_id))
+        changed.add(cluster_id)
+        return cluster_id, changed
+
+    def flush(self):
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.uncommitted = 0
+
+    def assignments(self) -> dict:
+        """返回 {bossURL: 簇编号字符串}。"""
+        self.flush()
+        cursor = self.conn.execute("SELECT bossURL, cluster_id FROM docs")
+        return {url: str(cluster_id) for url, cluster_id in cursor}
+
+    def changed_assignments(self) -> dict:
+        """
+        返回自上次调用以来簇编号可能发生变化的记录 {bossURL: 簇编号字符串}，
+        即新加入或重新加入的记录，以及被合并或更换了簇编号的簇中的全部记录。
+        """
+        self.flush()
+        cluster_ids = sorted(self.changed_clusters)
+        self.changed_clusters = set()
+        result = {}
+        # 分批查询，避免超出 SQLite 的参数个数上限
+        for i in range(0, len(cluster_ids), 500):
+            chunk = cluster_ids[i : i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT bossURL, cluster_id FROM docs WHERE cluster_id IN ({placeholders})", chunk
+            )
+            result.update((url, str(cluster_id)) for url, cluster_id in cursor)
+        return result
+
+    def clusters(self, min_size: int = 2, limit: int = 20) -> list:
+        """
+        按簇大小降序返回 [(簇编号, 记录数), ...]。
+        """
+        return self.conn.execute(
+            "SELECT cluster_id, COUNT(*) AS size FROM docs GROUP BY cluster_id "
+            "HAVING size >= ? ORDER BY size DESC, cluster_id LIMIT ?",
+            (min_size, limit),
+        ).fetchall()
+
+    def rebuild(self, rows) -> int:
+        """
+        清空索引并按给定顺序重新加入全部记录，返回加入的条数。
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM bands")
+            self.conn.execute("DELETE FROM docs")
+        count = 0
+        for row in rows:
+            self.add(row)
+            count += 1
+        self.flush()
+        return count
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def sync_master_store(store, index: DuplicateIndex) -> int:
+    """
+    将索引中的簇编号写入总表存储的 cluster_id 列。
+    只更新自上次同步以来涉及的簇中的记录 (新记录加入时可能合并已有的簇，
+    因此总表中较早的记录也可能需要更新)，代价与本次变化的簇大小成正比，与总表的行数无关。
+    :return: 更新的行数
+    """
+    changed = [
+        {store.KEY: url, "cluster_id": cluster_id}
+        for url, cluster_id in index.changed_assignments().items()
+    ]
+    return store.update_columns(changed) if changed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="相似职位检测 (MinHash/LSH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="从总表存储重建索引，并更新总表的 cluster_id 列")
+    rebuild_parser.add_argument("--db", default=os.path.join(DATA_DIR, MASTER_DB_FILENAME))
+    clusters_parser = subparsers.add_parser("clusters", help="列出最大的相似职位簇")
+    clusters_parser.add_argument("--db", default=os.path.join(DATA_DIR, MASTER_DB_FILENAME))
+    clusters_parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    from data_manager import JOB_COLUMNS
+    from master_store import MasterStore
+
+    index = DuplicateIndex()
+    store = MasterStore(args.db, JOB_COLUMNS)
+    try:
+        if args.command == "rebuild":
+            df = store.read_dataframe([MasterStore.KEY, TEXT_COLUMN])
+            start = time.perf_counter()
+            rows = index.rebuild(df.to_dict(orient="records"))
+            elapsed = time.perf_counter() - start
+            updated = sync_master_store(store, index)
+            store.export_columnar()
+            print(
+                f"已从 {args.db} 重建相似职位索引，共 {rows} 条记录，耗时 {elapsed:.2f} 秒，"
+                f"更新了 {updated} 条记录的 cluster_id。"
+            )
+        else:
+            titles = store.read_dataframe([MasterStore.KEY, "职位名称", "公司"]).set_index(
+                MasterStore.KEY
+            )
+            members = {}
+            for url, cluster_id in index.assignments().items():
+                members.setdefault(cluster_id, []).append(url)
+            for cluster_id, size in index.clusters(limit=args.top):
+                print(f"簇 {cluster_id}：{size} 条")
+                for url in members.get(str(cluster_id), [])[:5]:
+                    if url in titles.index:
+                        print(f"  {titles.at[url, '职位名称']} - {titles.at[url, '公司']}  {url}")
+    finally:
+        store.close()
+        index.close()
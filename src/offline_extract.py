@@ -0,0 +1,171 @@
+# offline_extract.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.html
+
+from config import DATA_DIR, HTML_ARCHIVE_DIR, MASTER_DB_FILENAME, NEAR_DUPLICATE_ENABLED
+from data_manager import JOB_COLUMNS
+from html_archive import HtmlArchive
+from job_fields import build_job_data
+from master_store import MasterStore
+from near_duplicates import DuplicateIndex, sync_master_store
+from salary import add_salary_fields
+from stream_writer import CsvStreamWriter
+
+
+def _cls(name: str) -> str:
+    """XPath 中匹配 class 的条件，等价于 CSS 的 .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first_text(root, xpath: str):
+    nodes = root.xpath(xpath) if root is not None else []
+    return nodes[0].text_content().strip() if nodes else None
+
+
+def _inner_html(el) -> str:
+    return (el.text or "") + "".join(
+        lxml.html.tostring(child, encoding="unicode") for child in el
+    )
+
+
+def extract_fields_from_html(page_html: str) -> dict:
+    """
+    从详情页HTML中提取原始字段，选择器和备用逻辑与 job_scraper.EXTRACT_JOB_FIELDS_JS 一致。
+    """
+    doc = lxml.html.fromstring(page_html)
+    primaries = doc.xpath(f"//div[{_cls('info-primary')}]")
+    primary = primaries[0] if primaries else None
+
+    # 公司：常规位置缺失时，从HR信息中提取
+    company = _first_text(
+        doc, f"//*[{_cls('company-info-box')}]//*[{_cls('company-name')}]"
+    )
+    if company is None:
+        boss_info = _first_text(doc, f"//*[{_cls('boss-info-attr')}]")
+        company = boss_info.split("·")[0].strip() if boss_info is not None else "N/A"
+
+    # 工作经验：class名可能是 experiece 或 experience
+    experience = _first_text(primary, f".//p//span[{_cls('text-experiece')}]")
+    if experience is None:
+        experience = _first_text(primary, f".//p//span[{_cls('text-experience')}]")
+
+    # 职位描述：标题为“职位描述”的区块
+    description_html = None
+    for section in doc.xpath(f"//*[{_cls('job-detail-section')}]"):
+        if any("职位描述" in h.text_content() for h in section.xpath(".//h3")):
+            texts = section.xpath(f".//*[{_cls('job-sec-text')}]")
+            description_html = _inner_html(texts[0]) if texts else None
+            break
+
+    return {
+        "职位名称": _first_text(primary, ".//h1"),
+        "薪资": _first_text(primary, f".//span[{_cls('salary')}]"),
+        "公司": company,
+        "base地点": _first_text(primary, f".//p//a[{_cls('text-city')}]"),
+        "工作经验": experience,
+        "学历": _first_text(primary, f".//p//span[{_cls('text-degree')}]"),
+        "福利待遇": [
+            el.text_content()
+            for el in doc.xpath(
+                f"//*[{_cls('job-banner')}]//*[{_cls('tag-container-new')}]"
+                f"//*[{_cls('tag-all')} and {_cls('job-tags')}]//span"
+            )
+        ],
+        "领域tag": [
+            el.text_content()
+            for el in doc.xpath(f"//ul[{_cls('job-keyword-list')}]//li")
+        ],
+        "职位描述HTML": description_html,
+    }
+
+
+def _extract_entry(task: tuple):
+    """
+    进程池中执行：读取一条快照并提取职位数据，失败时返回 None。
+    """
+    archive_root, entry = task
+    try:
+        page_html = HtmlArchive(archive_root).read(entry["sha256"])
+        return build_job_data(
+            extract_fields_from_html(page_html), entry["url"], entry["获取时间"]
+        )
+    except Exception:
+        return None
+
+
+def reextract_archive(
+    archive_root: str,
+    output_csv: str = None,
+    to_master: bool = False,
+    workers: int = None,
+) -> dict:
+    """
+    使用进程池重新解析整个存档，结果按存档顺序写入CSV和/或总表存储。
+    :return: {"total": 快照数, "extracted": 成功数, "failed": 失败数}
+    """
+    archive = HtmlArchive(archive_root)
+    entries = archive.entries()
+    archive.close()
+
+    tasks = [(archive_root, entry) for entry in entries]
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_extract_entry, tasks, chunksize=chunksize))
+
+    rows = [add_salary_fields(row) for row in results if row]
+    store = MasterStore(os.path.join(DATA_DIR, MASTER_DB_FILENAME), JOB_COLUMNS) if to_master else None
+    try:
+        # 比总表中已有记录更旧的快照不写入总表，也不参与归簇，以免覆盖较新的数据并产生倒序的变更历史
+        current, older = store.split_older(rows) if store is not None else (rows, [])
+        if older:
+            print(f"跳过 {len(older)} 个早于总表记录的快照。")
+        # 职位描述可能随提取规则变化，重新分配相似职位的簇编号
+        duplicate_index = DuplicateIndex() if NEAR_DUPLICATE_ENABLED else None
+        if duplicate_index is not None:
+            for row in current:
+                row["cluster_id"] = duplicate_index.add(row)
+            duplicate_index.flush()
+        if output_csv:
+            with CsvStreamWriter(output_csv, JOB_COLUMNS, flush_rows=1000) as writer:
+                for row in rows:
+                    writer.write(row)
+        if store is not None:
+            stats = store.upsert(current, run="offline_extract")
+            if duplicate_index is not None:
+                sync_master_store(store, duplicate_index)
+            store.export_columnar()
+            print(
+                f"总表更新：新增 {stats['inserted']} 条，更新 {stats['updated']} 条，"
+                f"未变化 {stats['unchanged']} 条。"
+            )
+        if duplicate_index is not None:
+            duplicate_index.close()
+    finally:
+        if store is not None:
+            store.close()
+    return {"total": len(entries), "extracted": len(rows), "failed": len(entries) - len(rows)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从HTML快照存档离线重新提取职位数据")
+    parser.add_argument("--archive", default=HTML_ARCHIVE_DIR, help="存档目录")
+    parser.add_argument("--output", help="输出CSV文件路径")
+    parser.add_argument("--master", action="store_true", help="将结果 upsert 到总表存储")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核数")
+    args = parser.parse_args()
+
+    if not args.output and not args.master:
+        parser.error("请至少指定 --output 或 --master")
+
+    start = time.perf_counter()
+    result = reextract_archive(args.archive, args.output, args.master, args.workers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"共 {result['total']} 个快照，成功提取 {result['extracted']} 条，"
+        f"失败 {result['failed']} 条，耗时 {elapsed:.2f} 秒。"
+    )
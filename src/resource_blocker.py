@@ -0,0 +1,70 @@
+# resource_blocker.py
+
+from urllib.parse import urlparse
+
+from config import (
+    logger,
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_HOSTS,
+    BOSS_SECURITY_CHECK_URL,
+)
+
+
+class ResourceBlocker:
+    """
+    轻量爬取模式：在 browser context 上拦截请求，
+    中止图片、字体、媒体等非必要资源以及已知的第三方统计/广告域名。
+    页面自身的脚本和样式照常加载；安全验证页面的请求一律放行，
+    登录页面的二维码图片需要在登录完成后再安装拦截器。
+    """
+
+    def __init__(
+        self,
+        resource_types: tuple = BLOCKED_RESOURCE_TYPES,
+        hosts: tuple = BLOCKED_HOSTS,
+    ):
+        """
+        :param resource_types: 需要拦截的资源类型 (Playwright 的 request.resource_type)
+        :param hosts: 需要拦截的域名，同时匹配其子域名
+        """
+        self.resource_types = set(resource_types)
+        self.hosts = tuple(hosts)
+        self.blocked_count = 0
+        self.allowed_count = 0
+
+    def _is_blocked_host(self, url: str) -> bool:
+        host = urlparse(url).hostname or ""
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    @staticmethod
+    def _is_security_check(request) -> bool:
+        try:
+            return request.frame.url.startswith(BOSS_SECURITY_CHECK_URL)
+        except Exception:
+            return False
+
+    def _handle_route(self, route):
+        request = route.request
+        if self._is_security_check(request):
+            self.allowed_count += 1
+            route.continue_()
+        elif request.resource_type in self.resource_types or self._is_blocked_host(
+            request.url
+        ):
+            self.blocked_count += 1
+            route.abort()
+        else:
+            self.allowed_count += 1
+            route.continue_()
+
+    def install(self, context):
+        """
+        在 context 上注册拦截规则，对之后打开的所有页面生效。
+        """
+        context.route("**/*", self._handle_route)
+        logger.info(
+            f"已开启轻量爬取模式，拦截资源类型: {', '.join(sorted(self.resource_types))}"
+        )
+
+    def summary(self) -> str:
+        return f"已拦截 {self.blocked_count} 个请求，放行 {self.allowed_count} 个请求"
@@ -0,0 +1,232 @@
+# salary.py
+
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, MASTER_DB_FILENAME
+
+# 薪资字段的数值化：将 "15-25K·14薪"、"200-300元/天"、"面议" 等原始文本解析为
+# salary_min / salary_max (元/计薪单位)、months (月薪的发薪月数)、
+# annual_estimate (年收入估算，元) 和 salary_unit (monthly/daily/...)，
+# 供表格按数值排序、过滤以及后续统计使用。
+
+SALARY_COLUMNS = ["salary_min", "salary_max", "months", "annual_estimate", "salary_unit"]
+SALARY_NUMERIC_COLUMNS = ["salary_min", "salary_max", "months", "annual_estimate"]
+
+# 单位写法 -> (计薪周期, 换算为元的倍数)；按长度从长到短匹配，"万/年" 优先于 "万"
+SALARY_UNITS = {
+    "万/年": ("yearly", 10000),
+    "元/月": ("monthly", 1),
+    "元/周": ("weekly", 1),
+    "元/天": ("daily", 1),
+    "元/时": ("hourly", 1),
+    "K": ("monthly", 1000),
+    "k": ("monthly", 1000),
+    "千": ("monthly", 1000),
+    "万": ("monthly", 10000),
+    "元": ("monthly", 1),
+}
+
+# 非月薪的计薪周期折算为一年的周期数 (按每年 250 个工作日、每天 8 小时)
+PERIODS_PER_YEAR = {"yearly": 1, "weekly": 52, "daily": 250, "hourly": 2000}
+
+# 未注明 "·N薪" 的月薪按 12 个月计算
+DEFAULT_MONTHS = 12
+
+SALARY_PATTERN = (
+    r"^\s*(?P<low>\d+(?:\.\d+)?)(?:\s*-\s*(?P<high>\d+(?:\.\d+)?))?\s*"
+    r"(?P<unit>" + "|".join(re.escape(u) for u in SALARY_UNITS) + r")"
+    r"(?:\s*[·・]\s*(?P<months>\d+)\s*薪)?"
+)
+_salary_regex = re.compile(SALARY_PATTERN)
+
+_UNIT_PERIOD = {unit: period for unit, (period, _) in SALARY_UNITS.items()}
+_UNIT_SCALE = {unit: scale for unit, (_, scale) in SALARY_UNITS.items()}
+
+
+def normalize_salaries(salaries: pd.Series) -> pd.DataFrame:
+    """
+    批量解析薪资文本 (向量化)，返回与输入同索引、列为 SALARY_COLUMNS 的 DataFrame。
+    无法解析的文本 (如 "面议") 各列均为缺失值。
+    """
+    parts = salaries.astype("string").str.extract(SALARY_PATTERN)
+    period = parts["unit"].map(_UNIT_PERIOD).astype(object)
+    scale = parts["unit"].map(_UNIT_SCALE).astype(float)
+    low = parts["low"].astype(float) * scale
+    high = parts["high"].astype(float).fillna(parts["low"].astype(float)) * scale
+
+    is_monthly = (period == "monthly").to_numpy()
+    months = parts["months"].astype(float).where(is_monthly)
+    months = months.mask(is_monthly & months.isna(), DEFAULT_MONTHS)
+    periods_per_year = np.where(
+        is_monthly, months, period.map(PERIODS_PER_YEAR).astype(float)
+    )
+
+    result = pd.DataFrame(
+        {
+            "salary_min": low,
+            "salary_max": high,
+            "months": months,
+            "annual_estimate": ((low + high) / 2 * periods_per_year).round(),
+            "salary_unit": period.where(period.notna(), None),
+        },
+        index=salaries.index,
+    )
+    return result
+
+
+def format_salary_value(value) -> str:
+    """
+    将数值写为文本：整数不带小数点，缺失值为空字符串。
+    CSV 和总表中的数值统一使用该格式，保证重复写入时文本一致。
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    if isinstance(value, str):
+        return value
+    value = round(float(value), 2)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def parse_salary(text: str) -> dict:
+    """
+    解析单条薪资文本，规则与 normalize_salaries 相同，返回 SALARY_COLUMNS 对应的文本值。
+    用于逐条写入时，避免为一行数据构造 DataFrame。
+    """
+    match = _salary_regex.match(text) if isinstance(text, str) else None
+    if match is None:
+        return {column: "" for column in SALARY_COLUMNS}
+
+    period, scale = SALARY_UNITS[match.group("unit")]
+    low = float(match.group("low")) * scale
+    high = float(match.group("high") or match.group("low")) * scale
+    if period == "monthly":
+        months = float(match.group("months") or DEFAULT_MONTHS)
+        periods_per_year = months
+    else:
+        months = None
+        periods_per_year = PERIODS_PER_YEAR[period]
+    return {
+        "salary_min": format_salary_value(low),
+        "salary_max": format_salary_value(high),
+        "months": format_salary_value(months),
+        "annual_estimate": format_salary_value(round((low + high) / 2 * periods_per_year)),
+        "salary_unit": period,
+    }
+
+
+def add_salary_fields(job_data: dict) -> dict:
+    """
+    为单条职位数据补充薪资数值列 (原地修改并返回)。
+    """
+    job_data.update(parse_salary(job_data.get("薪资")))
+    return job_data
+
+
+def salary_read_columns(columns: list = None) -> tuple:
+    """
+    只读取部分列时，确定需要的薪资列和实际要读取的列：
+    旧文件缺少薪资数值列时需要从 "薪资" 列计算，因此请求了薪资数值列时一并读取 "薪资" 列。
+    :return: (实际读取的列, 传给 ensure_salary_columns 的 wanted)，columns 为空时读取全部列
+    """
+    if not columns:
+        return columns, SALARY_COLUMNS
+    wanted = [c for c in SALARY_COLUMNS if c in columns]
+    if wanted and "薪资" not in columns:
+        columns = columns + ["薪资"]
+    return columns, wanted
+
+
+def ensure_salary_columns(df: pd.DataFrame, wanted: list = SALARY_COLUMNS) -> pd.DataFrame:
+    """
+    读取数据集后调用：已有的薪资数值列转换为数值类型，缺少时从 "薪资" 列批量计算。
+    :param wanted: 需要的薪资列，只读取了部分列时不必计算其余的列
+    """
+    if "薪资" not in df.columns:
+        return df
+    missing = [c for c in wanted if c not in df.columns]
+    if missing:
+        normalized = normalize_salaries(df["薪资"])
+        df = df.assign(**{c: normalized[c] for c in missing})
+    present = [c for c in SALARY_NUMERIC_COLUMNS if c in df.columns and c not in missing]
+    if present:
+        df = df.assign(**{c: pd.to_numeric(df[c], errors="coerce") for c in present})
+    return df
+
+
+def salary_text_columns(salaries: pd.Series) -> pd.DataFrame:
+    """
+    批量解析并转换为写入文件用的文本 (格式与 parse_salary 一致)。
+    """
+    normalized = normalize_salaries(salaries)
+    return pd.DataFrame(
+        {c: normalized[c].map(format_salary_value) for c in SALARY_COLUMNS},
+        index=salaries.index,
+    )
+
+
+def backfill_csv(csv_path: str) -> int:
+    """
+    为已有的CSV文件补充或重新计算薪资数值列，原子替换原文件，返回行数。
+    """
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    if "薪资" not in df.columns:
+        return 0
+    df = df.assign(**salary_text_columns(df["薪资"]))
+    tmp_path = csv_path + ".tmp"
+    df.to_csv(
+        tmp_path, index=False, encoding="utf-8-sig", lineterminator="\n", quoting=csv.QUOTE_MINIMAL
+    )
+    os.replace(tmp_path, csv_path)
+    return len(df)
+
+
+def backfill_master_store(db_path: str) -> int:
+    """
+    为总表存储中的所有记录补充或重新计算薪资数值列，并更新总表的列式文件，返回更新的行数。
+    """
+    from data_manager import JOB_COLUMNS
+    from master_store import MasterStore
+
+    store = MasterStore(db_path, JOB_COLUMNS)
+    try:
+        df = store.read_dataframe([MasterStore.KEY, "薪资"])
+        values = salary_text_columns(df["薪资"])
+        values[MasterStore.KEY] = df[MasterStore.KEY]
+        rows = store.update_columns(values.to_dict(orient="records"))
+        store.export_columnar()
+        return rows
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="为已有数据补充薪资数值列")
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="要处理的CSV或总表(.db)文件，默认为 boss_data 下的总表存储和 all.csv",
+    )
+    args = parser.parse_args()
+
+    files = args.files or [
+        path
+        for path in (
+            os.path.join(DATA_DIR, MASTER_DB_FILENAME),
+            os.path.join(DATA_DIR, "all.csv"),
+        )
+        if os.path.exists(path)
+    ]
+    if not files:
+        print("没有找到需要处理的文件。")
+    for path in files:
+        if path.endswith(".db"):
+            rows = backfill_master_store(path)
+        else:
+            rows = backfill_csv(path)
+        print(f"已为 {path} 补充薪资数值列，共 {rows} 条记录。")
@@ -0,0 +1,237 @@
+# search_index.py
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+from config import DATA_DIR, MASTER_DB_FILENAME, SEARCH_INDEX_FILE
+
+# 职位全文索引 (SQLite FTS5)。
+# FTS5 自带的分词器按空格和标点切分，中文整句会成为一个词，因此写入前自行分词：
+# 连续的中日韩文字切成重叠的二元组 (推荐系统 -> 推荐 荐系 系统，外加末字 统)，
+# 英文和数字按单词小写。查询使用同样的分词，多字中文作为短语匹配相邻的二元组。
+
+# 索引中保存的字段，搜索结果直接从这里返回，不再读取数据文件
+DOC_COLUMNS = [
+    "bossURL",
+    "职位名称",
+    "薪资",
+    "公司",
+    "base地点",
+    "工作经验",
+    "学历",
+    "福利待遇",
+    "领域tag",
+    "职位描述内容",
+    "JD链接",
+    "获取时间",
+    "annual_estimate",
+]
+# 建立索引的字段 -> FTS 列名，以及排序时各列的权重 (bm25)
+INDEXED_COLUMNS = {"职位名称": "title", "领域tag": "tags", "职位描述内容": "description"}
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TERM_RE = re.compile(rf"[{_CJK}]+|[A-Za-z0-9]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def tokenize(text: str) -> list:
+    """
+    将文本切分为索引用的词：中文为重叠二元组加末字，英文和数字为小写单词。
+    """
+    tokens = []
+    for term in _TERM_RE.findall(text or ""):
+        if _CJK_RE.match(term):
+            tokens.extend(term[i : i + 2] for i in range(len(term) - 1))
+            tokens.append(term[-1])
+        else:
+            tokens.append(term.lower())
+    return tokens
+
+
+def build_match_query(query: str) -> str:
+    """
+    将用户输入转换为 FTS5 MATCH 表达式，所有词都需要命中 (AND)：
+    多字中文为二元组短语，单字中文和英文单词按前缀匹配。
+    """
+    clauses = []
+    for term in _TERM_RE.findall(query or ""):
+        if _CJK_RE.match(term) and len(term) > 1:
+            bigrams = [term[i : i + 2] for i in range(len(term) - 1)]
+            clauses.append('"' + " ".join(bigrams) + '"')
+        else:
+            clauses.append(f'"{term.lower()}"*')
+    return " ".join(clauses)
+
+
+class SearchIndex:
+    """
+    以 bossURL 为主键的职位全文索引，支持增量写入和按相关度分页查询。
+    写入的记录先缓存在内存中，达到 flush_rows 条或调用 flush() 时批量提交。
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_FILE, flush_rows: int = 100):
+        """
+        :param path: 索引文件路径 (SQLite)
+        :param flush_rows: 缓存达到该条数时自动提交
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        self.pending = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self._create_tables()
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _create_tables(self):
+        columns = ", ".join(f"{self._quote(c)} TEXT" for c in DOC_COLUMNS[1:])
+        fts_columns = ", ".join(INDEXED_COLUMNS.values())
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, "
+                f"bossURL TEXT UNIQUE NOT NULL, {columns})"
+            )
+            self.conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5({fts_columns}, "
+                f"tokenize = 'unicode61 remove_diacritics 0')"
+            )
+
+    def add(self, job_data: dict):
+        """
+        加入一条职位数据 (同一 bossURL 以最后一次为准)，达到批量大小时提交。
+        """
+        url = job_data.get("bossURL")
+        if not url:
+            return
+        self.pending[url] = job_data
+        if len(self.pending) >= self.flush_rows:
+            self.flush()
+
+    def add_many(self, rows) -> int:
+        count = 0
+        for row in rows:
+            self.add(row)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        """
+        将缓存的记录写入索引：已存在的 bossURL 先删除旧的索引内容再重新写入。
+        """
+        if not self.pending:
+            return
+        names = ", ".join(self._quote(c) for c in DOC_COLUMNS)
+        placeholders = ", ".join("?" * len(DOC_COLUMNS))
+        with self.conn:
+            for url, row in self.pending.items():
+                old = self.conn.execute("SELECT id FROM docs WHERE bossURL = ?", (url,)).fetchone()
+                if old is not None:
+                    self.conn.execute("DELETE FROM docs WHERE id = ?", old)
+                    self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", old)
+                values = [None if row.get(c) is None else str(row.get(c)) for c in DOC_COLUMNS]
+                cursor = self.conn.execute(
+                    f"INSERT INTO docs ({names}) VALUES ({placeholders})", values
+                )
+                self.conn.execute(
+                    f"INSERT INTO docs_fts (rowid, {', '.join(INDEXED_COLUMNS.values())}) "
+                    f"VALUES (?, ?, ?, ?)",
+                    [cursor.lastrowid]
+                    + [" ".join(tokenize(row.get(c) or "")) for c in INDEXED_COLUMNS],
+                )
+        self.pending = {}
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query: str, page: int = 1, size: int = 20, fields: list = None) -> dict:
+        """
+        按相关度 (bm25，职位名称 > 领域tag > 职位描述) 分页查询。
+        :param fields: 返回的字段，默认为全部 DOC_COLUMNS
+        :return: {"last_page": n, "last_row": 命中总数, "data": [...], "took_ms": 耗时}
+        """
+        start = time.perf_counter()
+        match = build_match_query(query)
+        if not match:
+            return {"last_page": 1, "last_row": 0, "data": [], "took_ms": 0.0}
+
+        columns = [c for c in (fields or DOC_COLUMNS) if c in DOC_COLUMNS]
+        select_cols = ", ".join(f"docs.{self._quote(c)}" for c in columns)
+        weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+        total = self.conn.execute(
+            "SELECT COUNT(*) FROM docs_fts WHERE docs_fts MATCH ?", (match,)
+        ).fetchone()[0]
+        cursor = self.conn.execute(
+            f"SELECT {select_cols}, bm25(docs_fts, {weights}) AS score "
+            f"FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid "
+            f"WHERE docs_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+            (match, size, (page - 1) * size),
+        )
+        data = []
+        for row in cursor:
+            record = dict(zip(columns, row[:-1]))
+            # bm25 越小越相关，取反后作为得分
+            record["score"] = round(-row[-1], 3)
+            data.append(record)
+        return {
+            "last_page": max(1, -(-total // size)),
+            "last_row": total,
+            "data": data,
+            "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def rebuild(self, rows) -> int:
+        """
+        清空索引并用给定的记录重建，返回写入的条数。
+        """
+        self.pending = {}
+        with self.conn:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM docs_fts")
+        count = self.add_many(rows)
+        with self.conn:
+            self.conn.execute("INSERT INTO docs_fts(docs_fts) VALUES ('optimize')")
+        return count
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="职位全文索引")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="从总表存储重建索引")
+    rebuild_parser.add_argument("--db", default=os.path.join(DATA_DIR, MASTER_DB_FILENAME))
+    query_parser = subparsers.add_parser("query", help="在终端中查询")
+    query_parser.add_argument("q")
+    query_parser.add_argument("--size", type=int, default=10)
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    try:
+        if args.command == "rebuild":
+            from data_manager import JOB_COLUMNS
+            from master_store import MasterStore
+
+            store = MasterStore(args.db, JOB_COLUMNS)
+            try:
+                df = store.read_dataframe(DOC_COLUMNS)
+            finally:
+                store.close()
+            start = time.perf_counter()
+            rows = index.rebuild(df.astype(object).where(df.notna(), None).to_dict(orient="records"))
+            print(f"已从 {args.db} 重建索引，共 {rows} 条记录，耗时 {time.perf_counter() - start:.2f} 秒。")
+        else:
+            result = index.search(args.q, size=args.size)
+            print(f"共命中 {result['last_row']} 条，耗时 {result['took_ms']} ms：")
+            for row in result["data"]:
+                print(f"  [{row['score']}] {row['职位名称']} - {row['公司']} - {row['薪资']}  {row['bossURL']}")
+    finally:
+        index.close()
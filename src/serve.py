@@ -0,0 +1,104 @@
+# serve.py
+
+import argparse
+import sys
+
+from config import (
+    REQUEST_QUEUE_TIMEOUT,
+    SERVE_HOST,
+    SERVE_PORT,
+    SERVE_THREADS,
+    SERVE_WORKERS,
+    logger,
+)
+
+# 网页应用的生产模式入口 (python app.py 为开发模式：单进程、debug 自动重载)。
+#   Linux/macOS：gunicorn 多进程 + 每进程多线程。数据集在主进程中预先读取解析，
+#                之后 fork 出的工作进程共享这些内存页，不必各自重新解析；
+#                列式文件 (.feather) 本身通过内存映射读取，也由操作系统在进程间共享页缓存。
+#   Windows 或未安装 gunicorn：waitress 单进程多线程。
+
+
+def preload(enabled: bool):
+    from app import preload_datasets
+
+    if not enabled:
+        return
+    loaded = preload_datasets()
+    logger.info(f"已预加载 {len(loaded)} 个数据集: {loaded}")
+
+
+def run_gunicorn(host: str, port: int, workers: int, threads: int, preload_data: bool):
+    from gunicorn.app.base import BaseApplication
+
+    class BossHunterApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "threads": threads,
+                "worker_class": "gthread",
+                # 先在主进程中导入应用 (并预加载数据集)，再 fork 工作进程
+                "preload_app": True,
+                # 流式响应可能持续较长时间
+                "timeout": 120,
+                "graceful_timeout": 30,
+                "accesslog": "-",
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+
+            preload(preload_data)
+            return app
+
+    BossHunterApplication().run()
+
+
+def run_waitress(host: str, port: int, threads: int, preload_data: bool):
+    from waitress import serve
+
+    from app import app
+
+    preload(preload_data)
+    logger.info(f"waitress 已启动: http://{host}:{port} (线程数 {threads})")
+    # 超过 connection_limit 的连接在操作系统的 backlog 中排队
+    serve(app, host=host, port=port, threads=threads, connection_limit=threads * 8, channel_timeout=120)
+
+
+def choose_server(name: str) -> str:
+    if name != "auto":
+        return name
+    if sys.platform == "win32":
+        return "waitress"
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return "waitress"
+    return "gunicorn"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以生产模式启动网页应用")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "waitress"], default="auto")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="工作进程数 (仅 gunicorn)")
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="每个进程的线程数")
+    parser.add_argument("--no-preload", action="store_true", help="启动时不预加载数据集")
+    args = parser.parse_args(argv)
+
+    server = choose_server(args.server)
+    logger.info(
+        f"使用 {server} 启动 (请求排队超时 {REQUEST_QUEUE_TIMEOUT} 秒)，健康检查: /healthz"
+    )
+    if server == "gunicorn":
+        run_gunicorn(args.host, args.port, args.workers, args.threads, not args.no_preload)
+    else:
+        run_waitress(args.host, args.port, args.threads, not args.no_preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# stand_in_server.py
+
+import argparse
+import glob
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config import LIST_API_URL_PATTERN
+
+# 本地替身站点：按 JobScraper 依赖的选择器和接口格式提供列表页、列表接口和详情页，
+# 用于在不访问真实网站的情况下测试接口截获模式 (LIST_SOURCE = "api") 和 DOM 模式，
+# 也可按指定的页数、职位数和响应延迟生成数据，作为 benchmark.py 的压测对象。
+
+LIST_PAGE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>感兴趣</title></head>
+<body>
+<ul class="user-jobs-ul"></ul>
+<div class="pagination-area"><a class="next"><i class="ui-icon-arrow-right">&gt;</i></a></div>
+<script>
+const API = "%(api)s";
+let page = Number(new URLSearchParams(location.search).get("page")) || 1;
+async function load() {
+    const response = await fetch(`${API}?tag=4&page=${page}`, {credentials: "include"});
+    const payload = await response.json();
+    const list = document.querySelector("ul.user-jobs-ul");
+    list.innerHTML = "";
+    for (const card of payload.zpData.cardList) {
+        const li = document.createElement("li");
+        li.className = "item-boss";
+        li.innerHTML = `<div class="job-name"><a class="name" href="/job_detail/${card.encryptJobId}.html?lid=${card.lid}&securityId=${card.securityId}">${card.jobName}</a></div>`;
+        list.appendChild(li);
+    }
+    document.querySelector("div.pagination-area a").className = payload.zpData.hasMore ? "next" : "next disabled";
+}
+document.querySelector("div.pagination-area a").addEventListener("click", () => { page += 1; load(); });
+load();
+</script>
+</body></html>
+"""
+
+DETAIL_PAGE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>%(title)s</title></head>
+<body>
+<div class="job-banner">
+  <div class="info-primary">
+    <h1>%(title)s</h1><span class="salary">%(salary)s</span>
+    <p><a class="text-city">%(city)s</a><span class="text-experiece">%(experience)s</span><span class="text-degree">%(degree)s</span></p>
+  </div>
+  <div class="tag-container-new"><div class="tag-all job-tags">%(welfare)s</div></div>
+</div>
+<div class="company-info-box"><a class="company-name">%(company)s</a></div>
+<ul class="job-keyword-list">%(keywords)s</ul>
+<div class="job-detail"><div class="job-detail-section"><h3>职位描述</h3><div class="job-sec-text">%(description)s</div></div></div>
+</body></html>
+"""
+
+
+def render_detail_page(card: dict) -> str:
+    """
+    根据列表接口中的一条职位数据生成详情页HTML。
+    """
+    esc = lambda v: html.escape(str(v or ""))
+    return DETAIL_PAGE_HTML % {
+        "title": esc(card.get("jobName")),
+        "salary": esc(card.get("salaryDesc")),
+        "city": esc(card.get("cityName")),
+        "experience": esc(card.get("jobExperience")),
+        "degree": esc(card.get("jobDegree")),
+        "company": esc(card.get("brandName")),
+        "welfare": "".join(f"<span>{esc(t)}</span>" for t in card.get("welfareList") or []),
+        "keywords": "".join(f"<li>{esc(t)}</li>" for t in card.get("skills") or []),
+        "description": "<br>".join(
+            esc(line) for line in str(card.get("postDescription") or "").splitlines()
+        ),
+    }
+
+
+GENERATED_CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都", "南京", "武汉"]
+GENERATED_TITLES = ["后端开发工程师", "前端开发工程师", "算法工程师", "数据分析师", "测试开发工程师", "产品经理"]
+GENERATED_COMPANIES = ["字节跳动", "腾讯", "阿里巴巴", "美团", "京东", "百度", "网易", "小红书"]
+GENERATED_EXPERIENCES = ["经验不限", "1-3年", "3-5年", "5-10年"]
+GENERATED_DEGREES = ["本科", "硕士", "博士", "学历不限"]
+GENERATED_WELFARE = ["五险一金", "带薪年假", "年终奖", "餐补", "定期体检", "弹性工作"]
+GENERATED_SKILLS = ["Python", "Java", "Go", "C++", "MySQL", "Redis", "Kafka", "PyTorch", "React"]
+
+
+def generate_cards(count: int, start: int = 0, seed: int = 0) -> list:
+    """
+    生成 count 条列表接口格式的职位数据，内容由 seed 和序号决定，多次生成结果相同。
+    """
+    rng = random.Random(seed * 1_000_003 + start)
+    cards = []
+    for i in range(start, start + count):
+        low = rng.randint(8, 40)
+        title = rng.choice(GENERATED_TITLES)
+        skills = rng.sample(GENERATED_SKILLS, 3)
+        cards.append(
+            {
+                "encryptJobId": f"job{seed:02d}{i:07d}",
+                "lid": f"lid{i}",
+                "securityId": f"sec{i}",
+                "jobName": title,
+                "salaryDesc": f"{low}-{low + rng.randint(5, 20)}K·{rng.choice([12, 13, 14, 15, 16])}薪",
+                "brandName": rng.choice(GENERATED_COMPANIES),
+                "cityName": rng.choice(GENERATED_CITIES),
+                "jobExperience": rng.choice(GENERATED_EXPERIENCES),
+                "jobDegree": rng.choice(GENERATED_DEGREES),
+                "welfareList": rng.sample(GENERATED_WELFARE, 3),
+                "skills": skills,
+                "postDescription": "\n".join(
+                    [f"岗位职责：负责{title}相关工作，参与系统设计与开发。"]
+                    + [f"{n}. 熟悉{skill}，有实际项目经验。" for n, skill in enumerate(skills, 1)]
+                ),
+            }
+        )
+    return cards
+
+
+class StandInSite:
+    """
+    替身站点的数据：按页保存列表接口的 JSON 数据，详情页按 encryptJobId 查找。
+    """
+
+    def __init__(
+        self,
+        pages: list,
+        detail_pages: dict = None,
+        list_latency: float = 0.0,
+        detail_latency: float = 0.0,
+    ):
+        """
+        :param pages: 每页一个列表接口返回的 JSON 数据 (payload)
+        :param detail_pages: {encryptJobId: 详情页HTML}，未提供的详情页由列表数据生成
+        :param list_latency: 列表页和列表接口的响应延迟 (秒)
+        :param detail_latency: 详情页的响应延迟 (秒)
+        """
+        self.pages = pages
+        self.detail_pages = detail_pages or {}
+        self.list_latency = list_latency
+        self.detail_latency = detail_latency
+        self.cards = {
+            card["encryptJobId"]: card
+            for payload in pages
+            for card in payload.get("zpData", {}).get("cardList", [])
+        }
+
+    @classmethod
+    def from_recorded(cls, payload_dir: str):
+        """
+        从录制的数据目录加载：page_1.json、page_2.json ... 为列表接口数据，
+        detail_<encryptJobId>.html 为详情页HTML (可选)。
+        """
+        page_files = sorted(
+            glob.glob(os.path.join(payload_dir, "page_*.json")),
+            key=lambda p: int(re.search(r"page_(\d+)\.json$", p).group(1)),
+        )
+        pages = []
+        for path in page_files:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(json.load(f))
+        detail_pages = {}
+        for path in glob.glob(os.path.join(payload_dir, "detail_*.html")):
+            job_id = os.path.basename(path)[len("detail_") : -len(".html")]
+            with open(path, "r", encoding="utf-8") as f:
+                detail_pages[job_id] = f.read()
+        return cls(pages, detail_pages)
+
+    @classmethod
+    def generate(cls, page_count: int, jobs_per_page: int, seed: int = 0, **kwargs):
+        """
+        生成 page_count 页、每页 jobs_per_page 个职位的站点，其余参数同 __init__。
+        """
+        pages = []
+        for page in range(page_count):
+            cards = generate_cards(jobs_per_page, start=page * jobs_per_page, seed=seed)
+            pages.append(
+                {
+                    "code": 0,
+                    "message": "Success",
+                    "zpData": {"hasMore": page + 1 < page_count, "cardList": cards},
+                }
+            )
+        return cls(pages, **kwargs)
+
+    def list_payload(self, page: int) -> dict:
+        if 1 <= page <= len(self.pages):
+            return self.pages[page - 1]
+        return {"code": 0, "message": "Success", "zpData": {"hasMore": False, "cardList": []}}
+
+    def detail_page(self, job_id: str) -> str:
+        if job_id in self.detail_pages:
+            return self.detail_pages[job_id]
+        card = self.cards.get(job_id)
+        return render_detail_page(card) if card else None
+
+
+def make_handler(site: StandInSite):
+    class StandInHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: str, content_type: str):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            if parts.path.startswith("/job_detail/"):
+                time.sleep(site.detail_latency)
+            else:
+                time.sleep(site.list_latency)
+
+            if parts.path.startswith(LIST_API_URL_PATTERN):
+                page = int(query.get("page", ["1"])[0])
+                self._send(200, json.dumps(site.list_payload(page), ensure_ascii=False), "application/json")
+            elif parts.path.startswith("/web/geek/recommend"):
+                self._send(200, LIST_PAGE_HTML % {"api": LIST_API_URL_PATTERN}, "text/html")
+            elif parts.path.startswith("/job_detail/"):
+                job_id = parts.path[len("/job_detail/") :].removesuffix(".html")
+                page_html = site.detail_page(job_id)
+                if page_html is None:
+                    self._send(404, "Not Found", "text/plain")
+                else:
+                    self._send(200, page_html, "text/html")
+            else:
+                self._send(404, "Not Found", "text/plain")
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start_server(site: StandInSite, host: str = "127.0.0.1", port: int = 0):
+    """
+    在后台线程中启动替身服务器，返回 (server, 根地址)。port 为 0 时自动分配端口。
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BOSS直聘本地替身服务器")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--payloads", help="录制的列表接口数据目录")
+    source.add_argument("--generate", type=int, metavar="PAGES", help="生成指定页数的数据")
+    parser.add_argument("--jobs-per-page", type=int, default=15, help="生成数据时每页的职位数")
+    parser.add_argument("--list-latency-ms", type=float, default=0, help="列表页/接口响应延迟 (毫秒)")
+    parser.add_argument("--detail-latency-ms", type=float, default=0, help="详情页响应延迟 (毫秒)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.payloads:
+        site = StandInSite.from_recorded(args.payloads)
+    else:
+        site = StandInSite.generate(args.generate, args.jobs_per_page)
+    site.list_latency = args.list_latency_ms / 1000
+    site.detail_latency = args.detail_latency_ms / 1000
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(site))
+    print(
+        f"替身服务器已启动: http://{args.host}:{args.port}/web/geek/recommend?tab=4&page=1 "
+        f"(共 {len(site.pages)} 页)"
+    )
+    server.serve_forever()
@@ -0,0 +1,143 @@
+# stream_writer.py
+
+import csv
+import json
+import os
+import time
+
+
+class _BufferedSink:
+    """
+    流式写入的基类：文件只打开一次，行数据先缓存在内存中，
+    达到指定行数或时间间隔后批量写入并 flush，关闭时 flush + fsync。
+    """
+
+    def __init__(self, path: str, flush_rows: int = 20, flush_interval: float = 5.0):
+        """
+        :param path: 目标文件路径
+        :param flush_rows: 缓存达到多少行时写入文件
+        :param flush_interval: 距上次写入超过多少秒时写入文件
+        """
+        self.path = path
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.rows_written = 0
+        self.last_flush = time.monotonic()
+        self.file = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_rows(self, rows: list):
+        raise NotImplementedError
+
+    def open(self):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._open()
+        return self
+
+    def write(self, row: dict):
+        """
+        缓存一行数据，满足条件时批量写入。
+        """
+        if self.file is None:
+            self.open()
+        self.buffer.append(row)
+        if (
+            len(self.buffer) >= self.flush_rows
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        将缓存的行写入文件并刷新到操作系统。
+        """
+        if self.file is None:
+            return
+        if self.buffer:
+            self._write_rows(self.buffer)
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def sync(self):
+        """
+        写入缓存的行并 fsync，保证已写入的行落盘。
+        """
+        if self.file is None:
+            return
+        self.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """
+        写入剩余数据，fsync 后关闭文件。
+        """
+        if self.file is None:
+            return
+        try:
+            self.sync()
+        finally:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvStreamWriter(_BufferedSink):
+    """
+    按固定列顺序流式追加写入CSV (UTF-8-SIG)。
+    文件不存在或为空时写入表头；文件已存在时沿用其表头的列顺序。
+    """
+
+    def __init__(self, path: str, columns: list, **kwargs):
+        """
+        :param columns: 新建文件时使用的列顺序
+        """
+        super().__init__(path, **kwargs)
+        self.columns = list(columns)
+        self.writer = None
+
+    def _open(self):
+        has_content = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if has_content:
+            with open(self.path, "r", encoding="utf-8-sig", newline="") as f:
+                header = next(csv.reader(f), None)
+            if header:
+                self.columns = header
+        # 追加模式下文件非空时 utf-8-sig 不会重复写入 BOM
+        self.file = open(self.path, "a", encoding="utf-8-sig", newline="")
+        self.writer = csv.DictWriter(
+            self.file,
+            fieldnames=self.columns,
+            restval="",
+            extrasaction="ignore",
+            lineterminator="\n",
+        )
+        if not has_content:
+            self.writer.writeheader()
+
+    def _write_rows(self, rows: list):
+        self.writer.writerows(rows)
+
+
+class JsonLinesWriter(_BufferedSink):
+    """
+    流式追加写入 JSON Lines 文件，每行一个JSON对象。
+    """
+
+    def _open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _write_rows(self, rows: list):
+        self.file.writelines(
+            json.dumps(row, ensure_ascii=False) + "\n" for row in rows
+        )
@@ -0,0 +1,118 @@
+# streaming.py
+
+import os
+import zlib
+
+import pandas as pd
+
+import columnar
+from data_manager import JOB_COLUMNS
+from master_store import MasterStore
+from salary import ensure_salary_columns, salary_read_columns
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只提供 gzip 压缩
+    brotli = None
+
+# 流式输出数据集：按块读取文件，每块转换为JSON后立即发送 (可选 gzip/brotli 压缩)，
+# 服务器同一时间只持有一块数据，客户端收到第一块即可开始渲染。
+
+# 支持的流格式 -> Content-Type
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def iter_dataframes(file_path: str, chunk_rows: int, columns: list = None):
+    """
+    按块读取数据集，逐块产出 DataFrame，只读取指定的列。
+    .json 文件优先读取运行时同步写入的 .jsonl 文件；没有时只能整体读取后再分块。
+    """
+    read_columns, wanted = salary_read_columns(columns)
+    for chunk in _iter_raw_dataframes(file_path, chunk_rows, read_columns):
+        chunk = ensure_salary_columns(chunk, wanted)
+        if columns:
+            chunk = chunk[[c for c in columns if c in chunk.columns]]
+        yield chunk
+
+
+def _iter_raw_dataframes(file_path: str, chunk_rows: int, columns: list = None):
+    if file_path.endswith(columnar.COLUMNAR_EXTENSION):
+        if columns:
+            available = set(columnar.read_columns(file_path))
+            columns = [c for c in columns if c in available]
+        table = columnar.feather.read_table(file_path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            yield batch.to_pandas()
+    elif file_path.endswith(".csv"):
+        yield from pd.read_csv(
+            file_path,
+            chunksize=chunk_rows,
+            usecols=(lambda c: c in columns) if columns else None,
+        )
+    elif file_path.endswith(".json"):
+        jsonl_path = file_path[: -len(".json")] + ".jsonl"
+        if os.path.exists(jsonl_path):
+            yield from pd.read_json(jsonl_path, lines=True, chunksize=chunk_rows, dtype=False)
+        else:
+            df = pd.read_json(file_path, orient="records", dtype=False)
+            for i in range(0, len(df), chunk_rows):
+                yield df.iloc[i : i + chunk_rows]
+    elif file_path.endswith(".db"):
+        store = MasterStore(file_path, JOB_COLUMNS)
+        try:
+            yield from store.iter_dataframes(columns, chunk_rows)
+        finally:
+            store.close()
+    else:
+        raise ValueError("Unsupported file type")
+
+
+def encode_chunks(dataframes, fmt: str):
+    """
+    将 DataFrame 块编码为 NDJSON (每行一条记录) 或 JSON 数组的片段，逐块产出字节。
+    """
+    first = True
+    if fmt == "json":
+        yield b"["
+    for df in dataframes:
+        if df.empty:
+            continue
+        if fmt == "ndjson":
+            body = df.to_json(orient="records", lines=True, force_ascii=False)
+            yield body.rstrip("\n").encode() + b"\n"
+        else:
+            body = df.to_json(orient="records", force_ascii=False)[1:-1]
+            yield (body if first else "," + body).encode()
+        first = False
+    if fmt == "json":
+        yield b"]"
+
+
+def negotiate_encoding(accept_encodings) -> str:
+    """
+    根据请求的 Accept-Encoding 选择压缩方式：br (已安装 brotli 时) > gzip > 不压缩。
+    """
+    supported = (["br"] if brotli is not None else []) + ["gzip"]
+    return accept_encodings.best_match(supported)
+
+
+def compress_chunks(chunks, encoding: str):
+    """
+    逐块压缩：每块压缩后立即刷新输出，客户端无需等待整个响应即可解压。
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    else:
+        yield from chunks
@@ -0,0 +1,116 @@
+# throttle.py
+
+import time
+
+
+class RateLimiter:
+    """
+    全局请求速率限制器 (令牌桶)。
+    所有详情页请求在发起前调用 acquire()，保证整体速率不超过 max_rps。
+    """
+
+    def __init__(self, max_rps: float, burst: int = 1, sleep=time.sleep):
+        """
+        :param max_rps: 每秒最多允许的请求数，<= 0 表示不限速
+        :param burst: 令牌桶容量，允许的瞬时突发请求数
+        :param sleep: 等待函数 (参数为秒)，默认 time.sleep
+        """
+        self.max_rps = max_rps
+        self.sleep = sleep
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.last_refill) * self.max_rps
+        )
+        self.last_refill = now
+
+    def acquire(self):
+        """
+        获取一个令牌，必要时阻塞等待。
+        """
+        if self.max_rps <= 0:
+            return
+        self._refill()
+        if self.tokens < 1:
+            self.sleep((1 - self.tokens) / self.max_rps)
+            self._refill()
+        self.tokens -= 1
+
+
+class AdaptiveThrottle:
+    """
+    AIMD 自适应请求间隔：
+    - 响应变慢或被重定向到安全验证页时，间隔按倍数放大 (multiplicative increase)
+    - 响应正常时，间隔按固定步长缩小 (additive decrease)，直到最小间隔
+    """
+
+    def __init__(
+        self,
+        initial_delay: float,
+        min_delay: float,
+        max_delay: float,
+        slow_seconds: float,
+        decrease_step: float,
+        backoff_factor: float,
+        sleep=time.sleep,
+    ):
+        """
+        :param initial_delay: 初始间隔 (秒)
+        :param min_delay: 最小间隔 (秒)
+        :param max_delay: 最大间隔 (秒)
+        :param slow_seconds: 单次加载耗时超过该值视为变慢
+        :param decrease_step: 响应正常时每次缩小的间隔 (秒)
+        :param backoff_factor: 变慢时间隔放大的倍数，遇到安全验证时再翻倍
+        :param sleep: 等待函数 (参数为秒)，默认 time.sleep
+        """
+        self.sleep = sleep
+        self.delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.slow_seconds = slow_seconds
+        self.decrease_step = decrease_step
+        self.backoff_factor = backoff_factor
+        self.last_wait_end = None
+        self.delays = []
+        self.slow_count = 0
+        self.security_count = 0
+
+    def record(self, latency: float, security_check: bool = False):
+        """
+        根据一次请求的结果调整间隔。
+        :param latency: 本次加载耗时 (秒)
+        :param security_check: 是否被重定向到安全验证页
+        """
+        if security_check:
+            self.security_count += 1
+            self.delay = min(self.max_delay, self.delay * self.backoff_factor * 2)
+        elif latency > self.slow_seconds:
+            self.slow_count += 1
+            self.delay = min(self.max_delay, self.delay * self.backoff_factor)
+        else:
+            self.delay = max(self.min_delay, self.delay - self.decrease_step)
+
+    def wait(self):
+        """
+        距上次 wait 结束不足当前间隔时，补足剩余时间。
+        期间处理页面所花的时间计入间隔，不再额外等待。
+        """
+        self.delays.append(self.delay)
+        if self.last_wait_end is not None:
+            remaining = self.delay - (time.monotonic() - self.last_wait_end)
+            if remaining > 0:
+                self.sleep(remaining)
+        self.last_wait_end = time.monotonic()
+
+    def summary(self) -> str:
+        if not self.delays:
+            return "未发生请求间隔调整"
+        return (
+            f"请求间隔: 最小 {min(self.delays):.2f}s，平均 {sum(self.delays) / len(self.delays):.2f}s，"
+            f"最大 {max(self.delays):.2f}s，当前 {self.delay:.2f}s；"
+            f"变慢 {self.slow_count} 次，安全验证 {self.security_count} 次"
+        )
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from data_manager import JOB_COLUMNS  # noqa: E402
+from master_store import MasterStore  # noqa: E402
+
+
+def test_split_older_keeps_snapshots_older_than_master_out(tmp_path):
+    store = MasterStore(str(tmp_path / "master.sqlite"), JOB_COLUMNS)
+    store.upsert([{"bossURL": "a", "获取时间": "2025-02-01 00:00:00", "职位名称": "新"}], run="crawl")
+
+    rows = [
+        {"bossURL": "a", "获取时间": "2025-01-01 00:00:00", "职位名称": "旧"},
+        {"bossURL": "b", "获取时间": "2025-01-01 00:00:00", "职位名称": "新职位"},
+    ]
+    current, older = store.split_older(rows)
+    assert [row["bossURL"] for row in current] == ["b"]
+    assert [row["职位名称"] for row in older] == ["旧"]
+
+    # 同一时间或更新的快照照常写入
+    same, _ = store.split_older([{"bossURL": "a", "获取时间": "2025-02-01 00:00:00"}])
+    assert len(same) == 1
+    store.close()
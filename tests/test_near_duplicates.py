@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from near_duplicates import TEXT_COLUMN, DuplicateIndex  # noqa: E402
+
+BACKEND = "负责后端服务的设计与开发，熟悉 Python 和 MySQL，有分布式系统和高并发经验者优先，良好的沟通能力"
+FRONTEND = "负责前端页面开发与交互实现，熟悉 React、TypeScript 与工程化工具，关注用户体验和性能优化"
+
+
+def job(url, text):
+    return {"bossURL": url, TEXT_COLUMN: text}
+
+
+def test_readding_representative_moves_other_members_to_successor(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "index.sqlite"))
+    first = index.add(job("a", BACKEND))
+    assert index.add(job("b", BACKEND + "。")) == first
+    assert index.add(job("c", BACKEND + "！")) == first
+    index.changed_assignments()
+
+    # a 是簇的代表，改写描述后不再相似：b、c 应改用剩下最早的 b 作为簇编号
+    assert index.add(job("a", FRONTEND)) == first
+    assignments = index.assignments()
+    assert assignments["b"] == assignments["c"] != assignments["a"]
+
+    # 同步总表时只需要更新这次涉及的簇，且包含被改编号的 b、c
+    assert index.changed_assignments() == assignments
+    index.close()
+
+
+def test_changed_assignments_only_covers_touched_clusters(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "index.sqlite"))
+    index.add(job("a", BACKEND))
+    index.add(job("x", FRONTEND))
+    index.changed_assignments()
+
+    index.add(job("b", BACKEND + "。"))
+    assert set(index.changed_assignments()) == {"a", "b"}
+    assert index.changed_assignments() == {}
+    index.close()